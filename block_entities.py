@@ -0,0 +1,114 @@
+# block_entities.py
+from config import *
+
+class BlockEntityStore:
+    """
+    Extra per-block data (the contents of each chest), keyed by world position
+    and grouped by chunk so get() is two dict lookups.
+
+    Chunks restored from a save stay encoded until something asks for a block
+    in them, and unload_far() encodes chunks away from the player again, so only
+    nearby chests are kept as live dicts. serialize() writes one segment per
+    chunk without looking at the world grid.
+
+    Save format: chunks joined by ";", each "cx,cy=" followed by its chests
+    joined by "|", each "x,y:" followed by "item*count" pairs joined by ",".
+    """
+    def __init__(self, saved=""):
+        self.chunks = {}   # (cx, cy) -> {(x, y): {item: count}}
+        self.encoded = {}  # (cx, cy) -> saved segment not decoded yet
+        for segment in saved.split(";"):
+            if segment:
+                key, _, body = segment.partition("=")
+                cx, cy = map(int, key.split(","))
+                self.encoded[(cx, cy)] = body
+
+    # ------------------------------
+    # Lookup
+    # ------------------------------
+    def _chunk(self, x, y, create=False):
+        key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            body = self.encoded.pop(key, None)
+            if body is not None:
+                chunk = self.chunks[key] = _decode_chunk(body)
+            elif create:
+                chunk = self.chunks[key] = {}
+        return chunk
+
+    def get(self, x, y):
+        """
+        The contents of the chest at (x, y), or None if there is none.
+        """
+        chunk = self._chunk(x, y)
+        return chunk.get((x, y)) if chunk is not None else None
+
+    def create(self, x, y):
+        chunk = self._chunk(x, y, create=True)
+        return chunk.setdefault((x, y), {})
+
+    def remove(self, x, y):
+        """
+        Forget the chest at (x, y) and return its contents (or None).
+        """
+        chunk = self._chunk(x, y)
+        if chunk is None:
+            return None
+        contents = chunk.pop((x, y), None)
+        if not chunk:
+            del self.chunks[(x // CHUNK_SIZE, y // CHUNK_SIZE)]
+        return contents
+
+    def on_block_changed(self, x, y, old_block, new_block):
+        """
+        Create a chest's storage when one is placed. When one is removed, return
+        its contents so the caller can drop them.
+        """
+        if new_block == CHEST:
+            self.create(x, y)
+        elif old_block == CHEST:
+            return self.remove(x, y)
+        return None
+
+    # ------------------------------
+    # Chunk Residency
+    # ------------------------------
+    def unload_far(self, cx, cy, radius):
+        """
+        Encode every live chunk more than radius chunks away from (cx, cy).
+        """
+        for key in [key for key in self.chunks if max(abs(key[0] - cx), abs(key[1] - cy)) > radius]:
+            self.encoded[key] = _encode_chunk(self.chunks.pop(key))
+
+    # ------------------------------
+    # Saving
+    # ------------------------------
+    def serialize(self):
+        segments = [f"{cx},{cy}={body}" for (cx, cy), body in self.encoded.items()]
+        for (cx, cy), chunk in self.chunks.items():
+            if chunk:
+                segments.append(f"{cx},{cy}={_encode_chunk(chunk)}")
+        return ";".join(segments)
+
+def _encode_chunk(chunk):
+    parts = []
+    for (x, y), contents in chunk.items():
+        items = ",".join(f"{item}*{count}" for item, count in contents.items() if count)
+        parts.append(f"{x},{y}:{items}")
+    return "|".join(parts)
+
+def _decode_chunk(body):
+    chunk = {}
+    for part in body.split("|"):
+        if not part:
+            continue
+        position, _, items = part.partition(":")
+        x, y = map(int, position.split(","))
+        contents = {}
+        for pair in items.split(","):
+            if pair:
+                item, count = pair.split("*")
+                contents[int(item)] = int(count)
+        chunk[(x, y)] = contents
+    return chunk
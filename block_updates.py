@@ -0,0 +1,117 @@
+# block_updates.py
+import heapq
+from config import *
+
+class BlockUpdateScheduler:
+    """
+    Simulates falling sand and flowing water by only visiting cells that may
+    need to change. Cells are queued by edits (schedule_around is called for
+    every block change, including the ones made here) and processed in due order,
+    at most BLOCK_UPDATE_BUDGET per tick, so the cost follows activity rather
+    than world size.
+
+    Changes are applied through set_block(x, y, block) so lighting and other
+    derived state stay in sync.
+    """
+    def __init__(self, world, set_block):
+        self.world = world
+        self.set_block = set_block
+        self.queue = []          # heap of (due tick, x, y)
+        self.scheduled = set()   # cells currently in the queue
+        self.tick_count = 0
+        self.elapsed = 0.0
+
+    def schedule(self, x, y, delay=1):
+        if 0 <= x < WORLD_WIDTH and 0 <= y < WORLD_HEIGHT and (x, y) not in self.scheduled:
+            self.scheduled.add((x, y))
+            heapq.heappush(self.queue, (self.tick_count + delay, x, y))
+
+    def schedule_around(self, x, y):
+        """
+        Queue a changed cell and the neighbours that may react to it.
+        """
+        for nx, ny in ((x, y), (x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)):
+            if 0 <= nx < WORLD_WIDTH and 0 <= ny < WORLD_HEIGHT:
+                block = self.world[nx][ny]
+                if block == SAND:
+                    self.schedule(nx, ny, 1)
+                elif block == WATER:
+                    self.schedule(nx, ny, WATER_FLOW_DELAY)
+
+    def seed_world(self):
+        """
+        Queue every sand or water cell that can currently move. Run once when a
+        world is generated or loaded; afterwards only edits add cells.
+        """
+        world = self.world
+        for x in range(WORLD_WIDTH):
+            column = world[x]
+            for y in range(WORLD_HEIGHT):
+                if column[y] in (SAND, WATER) and self._can_move(x, y):
+                    self.schedule(x, y, 1)
+
+    def update(self, dt):
+        """
+        Advance by dt seconds, running whole ticks only (at most two per call so a
+        slow frame does not snowball).
+        """
+        self.elapsed += dt
+        ticks = 0
+        while self.elapsed >= BLOCK_TICK and ticks < 2:
+            self.elapsed -= BLOCK_TICK
+            self.tick()
+            ticks += 1
+        if ticks == 2:
+            self.elapsed = 0.0
+
+    def tick(self):
+        self.tick_count += 1
+        budget = BLOCK_UPDATE_BUDGET
+        queue = self.queue
+        while queue and queue[0][0] <= self.tick_count and budget > 0:
+            _, x, y = heapq.heappop(queue)
+            self.scheduled.discard((x, y))
+            self._update_cell(x, y)
+            budget -= 1
+
+    def _empty(self, x, y):
+        return 0 <= x < WORLD_WIDTH and 0 <= y < WORLD_HEIGHT and self.world[x][y] == AIR
+
+    def _can_move(self, x, y):
+        return self._target(x, y) is not None
+
+    def _target(self, x, y):
+        """
+        Where the sand or water at (x, y) moves next, or None if it is at rest.
+        """
+        block = self.world[x][y]
+        if block == SAND:
+            if y + 1 < WORLD_HEIGHT and self.world[x][y + 1] in (AIR, WATER):
+                return x, y + 1
+            return None
+        if block != WATER:
+            return None
+        if self._empty(x, y + 1):
+            return x, y + 1
+        # Alternate the preferred side so pools spread evenly.
+        sides = (-1, 1) if (x + y + self.tick_count) % 2 else (1, -1)
+        for side in sides:
+            if self._empty(x + side, y) and self._empty(x + side, y + 1):
+                return x + side, y + 1
+        # Water with more water on top is pushed sideways until the pool is one block deep.
+        if y > 0 and self.world[x][y - 1] == WATER:
+            for side in sides:
+                if self._empty(x + side, y):
+                    return x + side, y
+        return None
+
+    def _update_cell(self, x, y):
+        target = self._target(x, y)
+        if target is None:
+            return
+        tx, ty = target
+        block = self.world[x][y]
+        displaced = self.world[tx][ty]
+        # Sand sinks through water by swapping places with it.
+        self.set_block(tx, ty, block)
+        self.set_block(x, y, displaced)
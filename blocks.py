@@ -0,0 +1,60 @@
+# blocks.py
+
+class BlockRegistry:
+    """
+    Every block and item type, registered once with dense IDs (0, 1, 2, ...).
+    Properties are stored as flat tables indexed by ID, so hot loops (collision,
+    rendering, lighting, generation) do a list/bytearray lookup instead of
+    hashing into dicts and sets.
+
+    IDs are assigned in registration order and are written into save files, so
+    new blocks must be registered at the end.
+    """
+    def __init__(self):
+        self.names = []
+        self.ids = {}                     # name -> ID
+        self.solid = bytearray()          # 1 if players, mobs and light are blocked by it
+        self.color = []                   # RGB used for the tile and its inventory icon
+        self.hardness = []                # relative mining effort (0 = not breakable)
+        self.light_emission = bytearray() # light given off, 0-15
+        self.placeable = bytearray()      # 1 if it can be placed into the world
+
+    def register(self, name, color, solid=True, hardness=1.0, light_emission=0, placeable=True):
+        block_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = block_id
+        self.solid.append(1 if solid else 0)
+        self.color.append(color)
+        self.hardness.append(hardness)
+        self.light_emission.append(light_emission)
+        self.placeable.append(1 if placeable else 0)
+        return block_id
+
+    def __len__(self):
+        return len(self.names)
+
+registry = BlockRegistry()
+
+# Block type IDs (in save-file order)
+AIR        = registry.register("air",        (135, 206, 235), solid=False, hardness=0, placeable=False)  # sky blue
+GRASS      = registry.register("grass",      (0, 155, 0),     hardness=0.6)
+DIRT       = registry.register("dirt",       (120, 72, 0),    hardness=0.5)
+STONE      = registry.register("stone",      (100, 100, 100), hardness=1.5)
+COAL       = registry.register("coal",       (20, 20, 20),    hardness=3.0)
+IRON       = registry.register("iron",       (180, 180, 180), hardness=3.0)
+GOLD       = registry.register("gold",       (255, 215, 0),   hardness=3.0)
+DIAMOND    = registry.register("diamond",    (0, 255, 255),   hardness=3.0)
+WOOD       = registry.register("wood",       (101, 67, 33),   hardness=2.0)
+LEAVES     = registry.register("leaves",     (34, 139, 34),   hardness=0.2)
+CHEST      = registry.register("chest",      (150, 100, 40),  hardness=2.5)
+STICK      = registry.register("stick",      (130, 90, 50),   placeable=False)  # crafted item only
+WOOD_PLANK = registry.register("wood_plank", (190, 145, 90),  hardness=2.0)
+SAND       = registry.register("sand",       (237, 201, 175), hardness=0.5)
+WATER      = registry.register("water",      (30, 90, 220),   solid=False, hardness=0, placeable=False)
+
+# Property tables, indexed by block ID.
+SOLID = registry.solid
+COLOR = registry.color
+HARDNESS = registry.hardness
+LIGHT_EMISSION = registry.light_emission
+PLACEABLE = registry.placeable
@@ -1,6 +1,6 @@
 # collision.py
 import pygame
-from config import TILE_SIZE, WORLD_WIDTH, WORLD_HEIGHT, COLLISION_EPSILON, AIR
+from config import TILE_SIZE, WORLD_WIDTH, WORLD_HEIGHT, COLLISION_EPSILON, MOVE_SPEED, JUMP_VELOCITY, GRAVITY, SOLID
 
 def horizontal_collision(px, py, dx, player_width, player_height, world):
     """
@@ -15,7 +15,7 @@ def horizontal_collision(px, py, dx, player_width, player_height, world):
     y_end = min(WORLD_HEIGHT, int((py + player_height) // TILE_SIZE) + 1)
     for bx in range(x_start, x_end):
         for by in range(y_start, y_end):
-            if world[bx][by] != AIR:
+            if SOLID[world[bx][by]]:
                 block_rect = pygame.Rect(bx * TILE_SIZE, by * TILE_SIZE, TILE_SIZE, TILE_SIZE)
                 if player_rect.colliderect(block_rect):
                     # Collision detected: cancel horizontal movement.
@@ -38,7 +38,7 @@ def vertical_collision(px, py, dy, player_width, player_height, world):
     y_end = min(WORLD_HEIGHT, int((new_y + player_height) // TILE_SIZE) + 1)
     for bx in range(x_start, x_end):
         for by in range(y_start, y_end):
-            if world[bx][by] != AIR:
+            if SOLID[world[bx][by]]:
                 block_rect = pygame.Rect(bx * TILE_SIZE, by * TILE_SIZE, TILE_SIZE, TILE_SIZE)
                 if player_rect.colliderect(block_rect):
                     if dy > 0:
@@ -49,7 +49,7 @@ def vertical_collision(px, py, dy, player_width, player_height, world):
                         player_rect = pygame.Rect(px, new_y, player_width, player_height)
                         for bx2 in range(x_start, x_end):
                             for by2 in range(y_start, y_end):
-                                if world[bx2][by2] != AIR:
+                                if SOLID[world[bx2][by2]]:
                                     block_rect2 = pygame.Rect(bx2 * TILE_SIZE, by2 * TILE_SIZE, TILE_SIZE, TILE_SIZE)
                                     if player_rect.colliderect(block_rect2):
                                         return py, False  # Unable to resolve; cancel vertical movement.
@@ -57,3 +57,23 @@ def vertical_collision(px, py, dy, player_width, player_height, world):
                         # If moving upward, cancel the movement.
                         return py, False
     return new_y, landed
+
+def step_player(px, py, vel_y, on_ground, direction, jump, dt, player_width, player_height, world):
+    """
+    Advance the player by one frame of input: direction is -1, 0 or 1 and jump is
+    True while a jump key is held. Shared by the single-player loop, client-side
+    prediction and the server so all of them simulate identically.
+    Returns: (new_x, new_y, new_vel_y, on_ground, landed).
+    """
+    px = horizontal_collision(px, py, direction * MOVE_SPEED * dt, player_width, player_height, world)
+    if jump and on_ground:
+        vel_y = JUMP_VELOCITY
+        on_ground = False
+    vel_y += GRAVITY * dt
+    py, landed = vertical_collision(px, py, vel_y * dt, player_width, player_height, world)
+    if landed:
+        vel_y = 0
+        on_ground = True
+    else:
+        on_ground = False
+    return px, py, vel_y, on_ground, landed
@@ -18,36 +18,21 @@ TILE_SIZE = 40             # Size (in pixels) of each block
 WORLD_WIDTH = 200          # in blocks
 WORLD_HEIGHT = 100         # in blocks
 
+CHUNK_SIZE = 16            # in blocks (width and height of a cached render chunk)
+
+# Zoom levels (screen pixels per world pixel); - and = step through them.
+# At LOD_ZOOM and below the world is drawn from per-chunk images, not per tile.
+ZOOM_LEVELS = [1, 0.5, 0.25, 0.1, 0.05]
+LOD_ZOOM = 0.25
+
 NUM_SAVE_SLOTS = 5         # Number of save slots available
 
-# Block type IDs
-AIR     = 0
-GRASS   = 1
-DIRT    = 2
-STONE   = 3
-COAL    = 4
-IRON    = 5
-GOLD    = 6
-DIAMOND = 7
-WOOD    = 8
-LEAVES  = 9
-
-# Colors for blocks (RGB)
-colors = {
-    AIR:     (135, 206, 235),  # sky blue
-    GRASS:   (0, 155, 0),
-    DIRT:    (120, 72, 0),
-    STONE:   (100, 100, 100),
-    COAL:    (20, 20, 20),
-    IRON:    (180, 180, 180),
-    GOLD:    (255, 215, 0),
-    DIAMOND: (0, 255, 255),
-    WOOD:    (101, 67, 33),
-    LEAVES:  (34, 139, 34)
-}
+# Block type IDs and per-block property tables (SOLID, COLOR, HARDNESS,
+# LIGHT_EMISSION, PLACEABLE); new blocks are registered in blocks.py.
+from blocks import *
 
 # Inventory settings
-inventory_order = [DIRT, GRASS, STONE, COAL, IRON, GOLD, DIAMOND, WOOD, LEAVES]
+inventory_order = [DIRT, GRASS, STONE, COAL, IRON, GOLD, DIAMOND, WOOD, LEAVES, SAND, CHEST]
 default_inventory = {
     GRASS: 0,
     DIRT: 10,
@@ -57,7 +42,9 @@ default_inventory = {
     GOLD: 0,
     DIAMOND: 0,
     WOOD: 0,
-    LEAVES: 0
+    LEAVES: 0,
+    SAND: 0,
+    CHEST: 0
 }
 
 # Player settings
@@ -76,5 +63,33 @@ REGEN_TIME = 10          # seconds to regenerate 1 heart
 # Collision helper
 COLLISION_EPSILON = 0.1
 
+# Block update settings (falling sand, flowing water)
+BLOCK_TICK = 0.05            # seconds per block update tick
+BLOCK_UPDATE_BUDGET = 256    # most cell updates processed per tick
+WATER_FLOW_DELAY = 3         # ticks between water moves
+
+# Entity settings (mobs, dropped items, projectiles)
+ENTITY_CELL_SIZE = 2 * TILE_SIZE  # spatial hash cell size in pixels
+ITEM_SIZE = 16
+ITEM_LIFETIME = 300      # seconds before a dropped item despawns
+PICKUP_RADIUS = TILE_SIZE
+PICKUP_DELAY = 0.5       # seconds before a dropped item can be picked up
+MOB_SPEED = 80           # pixels per second
+MOB_HEALTH = 5
+MOB_DAMAGE = 1
+MOB_ATTACK_RANGE = TILE_SIZE
+MOB_ATTACK_COOLDOWN = 1.0
+MOB_SIGHT = 10 * TILE_SIZE
+MAX_MOBS = 20
+MOB_SPAWN_INTERVAL = 5   # seconds between mob spawn attempts
+PLAYER_DAMAGE = 1        # damage of a melee hit or projectile
+PROJECTILE_SPEED = 600   # pixels per second
+MOB_REPATH_INTERVAL = 1.0  # seconds between path requests while chasing
+PATH_BUDGET = 0.002        # seconds of path planning per frame
+
+# Chests further than this many chunks from the player are kept encoded.
+BLOCK_ENTITY_RADIUS = 2
+
 # Generation parameters
 TREE_CHANCE = 0.05  # chance per column to generate a tree
+WORLD_POOL_SIZE = 1  # random-seed worlds kept pregenerated for instant creation
@@ -0,0 +1,201 @@
+# crafting.py
+
+class Inventory(dict):
+    """
+    Item counts ({item_id: count}) that report every change to its listeners
+    as listener(item). Used for the player's inventory so the crafting index
+    only re-checks the recipes an item change can affect.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.listeners = []
+
+    def _changed(self, item):
+        for listener in self.listeners:
+            listener(item)
+
+    def __setitem__(self, item, count):
+        super().__setitem__(item, count)
+        self._changed(item)
+
+    def __delitem__(self, item):
+        super().__delitem__(item)
+        self._changed(item)
+
+    def pop(self, item, *default):
+        result = super().pop(item, *default)
+        self._changed(item)
+        return result
+
+    def update(self, *args, **kwargs):
+        for item, count in dict(*args, **kwargs).items():
+            self[item] = count
+
+    def clear(self):
+        items = list(self)
+        super().clear()
+        for item in items:
+            self._changed(item)
+
+class CraftingIndex:
+    """
+    Tracks which recipes can be crafted from an inventory, including recipes
+    that need intermediate crafts first (CHEST from WOOD via WOOD_PLANK).
+
+    Each item maps to the outputs whose recipe tree uses it, so a count change
+    only marks those outputs for re-checking; craftable() re-plans just the
+    marked ones. Plans and craft-max counts are memoized per output until an
+    item in its tree changes.
+
+    recipes: {output: {ingredient: amount}}, one output per craft.
+    """
+    def __init__(self, recipes):
+        self.recipes = recipes
+        self.order = {output: i for i, output in enumerate(recipes)}
+        self.users = {}         # item -> outputs whose recipe tree uses it
+        for output in recipes:
+            for item in self._tree(output, set()):
+                self.users.setdefault(item, set()).add(output)
+        self.inventory = None
+        self.available = {}     # output -> craftable right now
+        self.dirty = set(recipes)
+        self.plans = {}         # output -> {count: plan}
+        self.max_counts = {}    # output -> most that can be crafted
+        self._craftable = None
+
+    def _tree(self, output, seen):
+        """
+        Every item in output's recipe tree (ingredients and their ingredients).
+        """
+        items = set()
+        for item in self.recipes[output]:
+            items.add(item)
+            if item in self.recipes and item not in seen:
+                seen.add(item)
+                items |= self._tree(item, seen)
+        return items
+
+    # ------------------------------
+    # Inventory Tracking
+    # ------------------------------
+    def attach(self, inventory):
+        """
+        Follow a new inventory (an Inventory). Does nothing if it is already attached.
+        """
+        if inventory is self.inventory:
+            return
+        if self.inventory is not None:
+            self.inventory.listeners.remove(self.on_item_changed)
+        self.inventory = inventory
+        inventory.listeners.append(self.on_item_changed)
+        self.dirty = set(self.recipes)
+        self.plans.clear()
+        self.max_counts.clear()
+        self._craftable = None
+
+    def on_item_changed(self, item):
+        outputs = self.users.get(item)
+        if outputs:
+            self.dirty |= outputs
+            for output in outputs:
+                self.plans.pop(output, None)
+                self.max_counts.pop(output, None)
+            self._craftable = None
+
+    def craftable(self):
+        """
+        Outputs that can be crafted at least once, in recipe-book order.
+        """
+        if self._craftable is None:
+            for output in self.dirty:
+                self.available[output] = self.plan(output) is not None
+            self.dirty.clear()
+            self._craftable = sorted((output for output, ok in self.available.items() if ok),
+                                     key=self.order.get)
+        return self._craftable
+
+    # ------------------------------
+    # Planning
+    # ------------------------------
+    def plan(self, output, count=1):
+        """
+        The crafts needed to make count of output from the current inventory,
+        as [(item, times)], or None if the inventory is short.
+        """
+        cached = self.plans.setdefault(output, {})
+        if count not in cached:
+            stock = dict(self.inventory)
+            steps = {}
+            ok = self._resolve(output, count, stock, steps, set(), True)
+            cached[count] = list(steps.items()) if ok else None
+        return cached[count]
+
+    def _resolve(self, item, amount, stock, steps, crafting, top):
+        if not top:
+            # Intermediate items are taken from stock before crafting more.
+            have = stock.get(item, 0)
+            used = min(have, amount)
+            stock[item] = have - used
+            amount -= used
+            if amount == 0:
+                return True
+        recipe = self.recipes.get(item)
+        if recipe is None or item in crafting:
+            return False
+        crafting.add(item)
+        for ingredient, needed in recipe.items():
+            if not self._resolve(ingredient, needed * amount, stock, steps, crafting, False):
+                return False
+        crafting.discard(item)
+        steps[item] = steps.get(item, 0) + amount
+        return True
+
+    def max_craftable(self, output):
+        """
+        The most of output that can be crafted at once.
+        """
+        if output not in self.max_counts:
+            low, high = 0, 1
+            while self.plan(output, high) is not None:
+                low, high = high, high * 2
+            # plan(low) succeeds and plan(high) fails.
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self.plan(output, middle) is not None:
+                    low = middle
+                else:
+                    high = middle
+            self.max_counts[output] = low
+        return self.max_counts[output]
+
+    # ------------------------------
+    # Crafting
+    # ------------------------------
+    def craft(self, output, count=1):
+        """
+        Craft count of output, running any intermediate crafts first. Returns
+        False (changing nothing) if the inventory is short.
+        """
+        steps = self.plan(output, count) if count > 0 else None
+        if steps is None:
+            return False
+        # Net change per item, so each count is written (and re-indexed) once.
+        delta = {}
+        for item, times in steps:
+            for ingredient, needed in self.recipes[item].items():
+                delta[ingredient] = delta.get(ingredient, 0) - needed * times
+            delta[item] = delta.get(item, 0) + times
+        inventory = self.inventory
+        for item, change in delta.items():
+            if change:
+                inventory[item] = inventory.get(item, 0) + change
+        return True
+
+    def craft_max(self, output):
+        """
+        Craft as many of output as the inventory allows. Returns how many.
+        """
+        count = self.max_craftable(output)
+        if count:
+            self.craft(output, count)
+        return count
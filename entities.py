@@ -0,0 +1,365 @@
+# entities.py
+import math
+import random
+import pygame
+from config import *
+
+# Entity kinds
+MOB = 0
+ITEM = 1
+PROJECTILE = 2
+
+mob_color = (40, 160, 60)
+projectile_color = (101, 67, 33)
+
+class Entity:
+    """
+    A mob, dropped item or projectile. Uses __slots__ so thousands of live
+    entities stay small and attribute access stays fast.
+    """
+    __slots__ = ("id", "kind", "x", "y", "vx", "vy", "width", "height", "on_ground",
+                 "health", "item", "count", "age", "cooldown", "attack_cooldown", "cell", "path", "path_step", "repath")
+
+    def __init__(self, entity_id, kind, x, y, width, height):
+        self.id = entity_id
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.vx = 0.0
+        self.vy = 0.0
+        self.width = width
+        self.height = height
+        self.on_ground = False
+        self.health = 0
+        self.item = None
+        self.count = 0
+        self.age = 0.0
+        self.cooldown = 0.0          # until a wandering mob picks a new direction
+        self.attack_cooldown = 0.0
+        self.cell = None
+        self.path = None
+        self.path_step = 0
+        self.repath = 0.0
+
+    def center(self):
+        return self.x + self.width / 2, self.y + self.height / 2
+
+class SpatialHash:
+    """
+    Buckets entities by ENTITY_CELL_SIZE grid cell so proximity and viewport
+    queries only look at nearby buckets instead of every entity. Buckets are
+    dicts keyed by entity id, so queries yield entities in the same order on
+    every run (sets of entities would follow memory addresses).
+    """
+    def __init__(self, cell_size=ENTITY_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _cell_of(self, entity):
+        return (int(entity.x // self.cell_size), int(entity.y // self.cell_size))
+
+    def insert(self, entity):
+        entity.cell = self._cell_of(entity)
+        self.cells.setdefault(entity.cell, {})[entity.id] = entity
+
+    def remove(self, entity):
+        bucket = self.cells.get(entity.cell)
+        if bucket is not None:
+            bucket.pop(entity.id, None)
+            if not bucket:
+                del self.cells[entity.cell]
+        entity.cell = None
+
+    def move(self, entity):
+        cell = self._cell_of(entity)
+        if cell != entity.cell:
+            self.remove(entity)
+            entity.cell = cell
+            self.cells.setdefault(cell, {})[entity.id] = entity
+
+    def query_rect(self, left, top, right, bottom):
+        """
+        Yield entities in every bucket overlapping the rect (callers do the exact test).
+        """
+        size = self.cell_size
+        # Entities are bucketed by their top-left corner, so widen by one cell.
+        for cx in range(int(left // size) - 1, int(right // size) + 1):
+            for cy in range(int(top // size) - 1, int(bottom // size) + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    yield from bucket.values()
+
+    def query_radius(self, x, y, radius):
+        for entity in self.query_rect(x - radius, y - radius, x + radius, y + radius):
+            ex, ey = entity.center()
+            if (ex - x) ** 2 + (ey - y) ** 2 <= radius * radius:
+                yield entity
+
+class EntityManager:
+    """
+    All live entities of the current world. update() moves them against the
+    tile grid, handles item pickup, mob attacks and projectile hits; draw()
+    only touches entities inside the camera viewport. With a pathfinder, chasing
+    mobs follow planned paths instead of walking straight at the player.
+    """
+    def __init__(self, world, pathfinder=None):
+        self.world = world
+        self.pathfinder = pathfinder
+        self.entities = {}
+        self.grid = SpatialHash()
+        self.next_id = 1
+        self.mob_count = 0
+
+    # ------------------------------
+    # Spawning
+    # ------------------------------
+    def _add(self, entity):
+        self.entities[entity.id] = entity
+        self.grid.insert(entity)
+        self.next_id += 1
+        return entity
+
+    def spawn_mob(self, x, y):
+        mob = Entity(self.next_id, MOB, x, y, TILE_SIZE // 2, TILE_SIZE)
+        mob.health = MOB_HEALTH
+        self.mob_count += 1
+        return self._add(mob)
+
+    def spawn_item(self, x, y, item, count=1, vx=0.0, vy=0.0):
+        drop = Entity(self.next_id, ITEM, x - ITEM_SIZE / 2, y - ITEM_SIZE / 2, ITEM_SIZE, ITEM_SIZE)
+        drop.item = item
+        drop.count = count
+        drop.vx = vx
+        drop.vy = vy
+        return self._add(drop)
+
+    def spawn_projectile(self, x, y, target_x, target_y, item=None):
+        """
+        Fire a projectile from (x, y) toward (target_x, target_y). If item is
+        given, the projectile drops as that item where it lands.
+        """
+        shot = Entity(self.next_id, PROJECTILE, x - 4, y - 4, 8, 8)
+        angle = math.atan2(target_y - y, target_x - x)
+        shot.vx = math.cos(angle) * PROJECTILE_SPEED
+        shot.vy = math.sin(angle) * PROJECTILE_SPEED
+        shot.item = item
+        return self._add(shot)
+
+    def remove(self, entity):
+        if self.entities.pop(entity.id, None) is not None:
+            self.grid.remove(entity)
+            if entity.kind == MOB:
+                self.mob_count -= 1
+
+    def clear(self):
+        self.entities.clear()
+        self.grid = SpatialHash()
+        self.mob_count = 0
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def mob_at(self, x, y):
+        """
+        The mob whose box contains the pixel (x, y), if any.
+        """
+        for entity in self.grid.query_rect(x, y, x, y):
+            if entity.kind == MOB and entity.x <= x < entity.x + entity.width and entity.y <= y < entity.y + entity.height:
+                return entity
+        return None
+
+    def damage(self, mob, amount):
+        mob.health -= amount
+        if mob.health <= 0:
+            self.remove(mob)
+
+    # ------------------------------
+    # Simulation
+    # ------------------------------
+    def _solid(self, tx, ty):
+        if 0 <= tx < WORLD_WIDTH and 0 <= ty < WORLD_HEIGHT:
+            return SOLID[self.world[tx][ty]]
+        # The world edges are walls; below the world is open so things fall out.
+        return ty < WORLD_HEIGHT
+
+    def _box_hits(self, x, y, width, height):
+        for tx in range(int(x // TILE_SIZE), int((x + width - COLLISION_EPSILON) // TILE_SIZE) + 1):
+            for ty in range(int(y // TILE_SIZE), int((y + height - COLLISION_EPSILON) // TILE_SIZE) + 1):
+                if self._solid(tx, ty):
+                    return True
+        return False
+
+    def _move(self, entity, dt):
+        """
+        Apply gravity and velocity one axis at a time. Returns True if the entity
+        hit a block.
+        """
+        hit = False
+        if entity.vx:
+            new_x = entity.x + entity.vx * dt
+            if self._box_hits(new_x, entity.y, entity.width, entity.height):
+                hit = True
+            else:
+                entity.x = new_x
+        entity.vy += GRAVITY * dt
+        new_y = entity.y + entity.vy * dt
+        if self._box_hits(entity.x, new_y, entity.width, entity.height):
+            hit = True
+            if entity.vy > 0:
+                # Rest on top of the block below.
+                entity.y = int((new_y + entity.height) // TILE_SIZE) * TILE_SIZE - entity.height
+                entity.on_ground = True
+            entity.vy = 0.0
+        else:
+            entity.y = new_y
+            entity.on_ground = False
+        return hit
+
+    def _resting(self, entity):
+        """
+        Items lying on solid ground skip physics until the block under them goes.
+        """
+        if not entity.on_ground or entity.vx or entity.vy:
+            return False
+        below = int((entity.y + entity.height) // TILE_SIZE)
+        tx = int((entity.x + entity.width / 2) // TILE_SIZE)
+        return self._solid(tx, below)
+
+    def update(self, dt, player_rect, inventory):
+        """
+        Advance every entity by dt. Items near the player go into inventory.
+        Returns the damage mobs dealt to the player this frame.
+        """
+        damage_to_player = 0
+        px, py = player_rect.center
+        pickup = []
+        for entity in list(self.entities.values()):
+            if entity.id not in self.entities:
+                # Removed earlier this frame (e.g. killed by a projectile).
+                continue
+            entity.age += dt
+            kind = entity.kind
+            if kind == ITEM:
+                if entity.age > ITEM_LIFETIME:
+                    self.remove(entity)
+                    continue
+                if not self._resting(entity):
+                    if self._move(entity, dt) and entity.on_ground:
+                        entity.vx = 0.0
+                    self.grid.move(entity)
+            elif kind == MOB:
+                damage_to_player += self._update_mob(entity, dt, px, py, player_rect)
+            else:
+                self._update_projectile(entity, dt)
+            if entity.y > WORLD_HEIGHT * TILE_SIZE:
+                self.remove(entity)
+        for entity in self.grid.query_radius(px, py, PICKUP_RADIUS):
+            if entity.kind == ITEM and entity.age >= PICKUP_DELAY:
+                pickup.append(entity)
+        for entity in pickup:
+            inventory[entity.item] = inventory.get(entity.item, 0) + entity.count
+            self.remove(entity)
+        return damage_to_player
+
+    def _update_mob(self, mob, dt, px, py, player_rect):
+        mx, my = mob.center()
+        distance = math.hypot(px - mx, py - my)
+        if distance < MOB_SIGHT:
+            if not self._follow_path(mob, dt, mx, my, px, player_rect):
+                mob.vx = MOB_SPEED if px > mx else -MOB_SPEED
+        elif mob.cooldown <= 0:
+            # Wander: pick a new direction every few seconds.
+            mob.vx = random.choice((-MOB_SPEED, 0, MOB_SPEED)) / 2
+            mob.cooldown = random.uniform(2, 5)
+        mob.cooldown -= dt
+        mob.attack_cooldown -= dt
+        blocked = mob.vx and self._box_hits(mob.x + mob.vx * dt, mob.y, mob.width, mob.height)
+        if blocked and mob.on_ground:
+            mob.vy = JUMP_VELOCITY
+        self._move(mob, dt)
+        self.grid.move(mob)
+        if distance < MOB_ATTACK_RANGE and mob.attack_cooldown <= 0:
+            mob.attack_cooldown = MOB_ATTACK_COOLDOWN
+            return MOB_DAMAGE
+        return 0
+
+    def _request_path(self, mob, mx, my, player_rect):
+        pathfinder = self.pathfinder
+        start = pathfinder.snap(int(mx // TILE_SIZE), int(my // TILE_SIZE))
+        goal = pathfinder.snap(int(player_rect.centerx // TILE_SIZE),
+                               int((player_rect.bottom - 1) // TILE_SIZE))
+        if start is None or goal is None:
+            mob.path = None
+            return
+
+        def arrived(path):
+            mob.path = path
+            mob.path_step = 0
+        pathfinder.request(mob.id, start, goal, arrived)
+
+    def _follow_path(self, mob, dt, mx, my, px, player_rect):
+        """
+        Steer a chasing mob along its planned path. Returns False when it has no
+        usable path, so the caller falls back to walking straight at the player.
+        """
+        if self.pathfinder is None:
+            return False
+        mob.repath -= dt
+        if mob.repath <= 0:
+            mob.repath = MOB_REPATH_INTERVAL
+            self._request_path(mob, mx, my, player_rect)
+        path = mob.path
+        if not path:
+            return False
+        cell = (int(mx // TILE_SIZE), int(my // TILE_SIZE))
+        # Advance past every node the mob has already reached.
+        for step in range(mob.path_step, min(len(path), mob.path_step + 3)):
+            if path[step] == cell:
+                mob.path_step = step
+                break
+        if mob.path_step + 1 >= len(path):
+            # End of the path: close the last gap directly.
+            return False
+        nx, ny = path[mob.path_step + 1]
+        target_x = (nx + 0.5) * TILE_SIZE
+        if abs(target_x - mx) > 2:
+            mob.vx = MOB_SPEED if target_x > mx else -MOB_SPEED
+        else:
+            mob.vx = 0.0
+        if ny < cell[1] and mob.on_ground:
+            mob.vy = JUMP_VELOCITY
+        return True
+
+    def _update_projectile(self, shot, dt):
+        if self._move(shot, dt):
+            if shot.item is not None:
+                cx, cy = shot.center()
+                self.spawn_item(cx, cy, shot.item)
+            self.remove(shot)
+            return
+        self.grid.move(shot)
+        cx, cy = shot.center()
+        for entity in self.grid.query_radius(cx, cy, TILE_SIZE // 2):
+            if entity.kind == MOB:
+                self.damage(entity, PLAYER_DAMAGE)
+                self.remove(shot)
+                return
+
+    # ------------------------------
+    # Drawing
+    # ------------------------------
+    def draw(self, screen, camera_x, camera_y, view_width, view_height, zoom=1):
+        """
+        Draw only the entities inside the viewport (view size in screen pixels).
+        """
+        right, bottom = camera_x + view_width / zoom, camera_y + view_height / zoom
+        for entity in self.grid.query_rect(camera_x, camera_y, right, bottom):
+            rect = pygame.Rect(int((entity.x - camera_x) * zoom), int((entity.y - camera_y) * zoom),
+                               max(1, int(entity.width * zoom)), max(1, int(entity.height * zoom)))
+            if entity.kind == MOB:
+                pygame.draw.rect(screen, mob_color, rect)
+            elif entity.kind == ITEM:
+                pygame.draw.rect(screen, COLOR[entity.item], rect)
+                pygame.draw.rect(screen, (0, 0, 0), rect, 1)
+            else:
+                pygame.draw.rect(screen, projectile_color, rect)
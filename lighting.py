@@ -0,0 +1,254 @@
+# lighting.py
+from collections import deque, OrderedDict
+import pygame
+from config import *
+from world_render import tile_pixels
+
+MAX_LIGHT = 15
+
+# Blocks light can pass through and light emitted by each block (indexed by block ID).
+TRANSPARENT = bytearray(not solid for solid in SOLID)
+EMISSION = LIGHT_EMISSION
+
+# Darkness drawn over a cell for each light level (0 = pitch black).
+SHADE_ALPHA = [int(220 * (MAX_LIGHT - level) / MAX_LIGHT) for level in range(MAX_LIGHT + 1)]
+
+# Memory for scaled shading overlays (a near-zoom chunk overlay is about 1.6 MB);
+# the least recently drawn are dropped beyond this.
+SHADING_CACHE_BYTES = 32 * 1024 * 1024
+
+class LightMap:
+    """
+    Sky light and block light for every cell, stored as flat bytearrays indexed
+    x * WORLD_HEIGHT + y. Light lives in transparent cells (and in emitting blocks);
+    solid blocks are shaded from their brightest neighbour when drawn.
+
+    compute_all() flood-fills the whole world once. on_block_changed() only
+    touches the cells whose light can change: at most MAX_LIGHT steps around the
+    edit, plus the column below it for sky light.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.sky = bytearray(WORLD_WIDTH * WORLD_HEIGHT)
+        self.block = bytearray(WORLD_WIDTH * WORLD_HEIGHT)
+        self.compute_all()
+
+    def compute_all(self):
+        world = self.world
+        sky_queue = deque()
+        block_queue = deque()
+        for x in range(WORLD_WIDTH):
+            column = world[x]
+            base = x * WORLD_HEIGHT
+            # Full sky light falls straight down until the first opaque block.
+            y = 0
+            while y < WORLD_HEIGHT and TRANSPARENT[column[y]]:
+                self.sky[base + y] = MAX_LIGHT
+                sky_queue.append(base + y)
+                y += 1
+            for y in range(WORLD_HEIGHT):
+                emission = EMISSION[column[y]]
+                if emission:
+                    self.block[base + y] = emission
+                    block_queue.append(base + y)
+        self._propagate(self.sky, sky_queue, True, set())
+        self._propagate(self.block, block_queue, False, set())
+
+    def level(self, x, y):
+        i = x * WORLD_HEIGHT + y
+        sky, block = self.sky[i], self.block[i]
+        return sky if sky > block else block
+
+    def shade_level(self, x, y):
+        """
+        Brightness a cell is drawn with: its own light if transparent, otherwise
+        the brightest light on any of its faces.
+        """
+        if TRANSPARENT[self.world[x][y]] or EMISSION[self.world[x][y]]:
+            return self.level(x, y)
+        best = 0
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= nx < WORLD_WIDTH and 0 <= ny < WORLD_HEIGHT:
+                level = self.level(nx, ny)
+                if level > best:
+                    best = level
+        return best
+
+    def on_block_changed(self, x, y, old_block, new_block):
+        """
+        Update light after world[x][y] changed from old_block to new_block.
+        Returns the set of chunk coordinates whose shading changed.
+        """
+        touched = {x * WORLD_HEIGHT + y}
+        for levels, is_sky in ((self.sky, True), (self.block, False)):
+            i = x * WORLD_HEIGHT + y
+            requeue = deque()
+            if levels[i]:
+                removal = deque([(i, levels[i])])
+                levels[i] = 0
+                self._remove(levels, removal, requeue, is_sky, touched)
+            # Relight the edited cell from its neighbours (and its own emission).
+            if TRANSPARENT[new_block]:
+                for n, _ in self._neighbours(i):
+                    if levels[n]:
+                        requeue.append(n)
+                if is_sky and y == 0:
+                    levels[i] = MAX_LIGHT
+                    requeue.append(i)
+            if not is_sky and EMISSION[new_block]:
+                levels[i] = EMISSION[new_block]
+                requeue.append(i)
+            self._propagate(levels, requeue, is_sky, touched)
+        return self._chunks_of(touched)
+
+    # ------------------------------
+    # Flood fill
+    # ------------------------------
+    def _neighbours(self, i):
+        """
+        Yield (index, is_below) for the four neighbours of cell i.
+        """
+        x, y = divmod(i, WORLD_HEIGHT)
+        if y + 1 < WORLD_HEIGHT:
+            yield i + 1, True
+        if y > 0:
+            yield i - 1, False
+        if x + 1 < WORLD_WIDTH:
+            yield i + WORLD_HEIGHT, False
+        if x > 0:
+            yield i - WORLD_HEIGHT, False
+
+    def _cell(self, i):
+        x, y = divmod(i, WORLD_HEIGHT)
+        return self.world[x][y]
+
+    def _propagate(self, levels, queue, is_sky, touched):
+        while queue:
+            i = queue.popleft()
+            value = levels[i]
+            if value <= 1:
+                continue
+            for n, below in self._neighbours(i):
+                if not TRANSPARENT[self._cell(n)]:
+                    continue
+                # Full sky light is not dimmed while falling straight down.
+                new_value = value if (is_sky and below and value == MAX_LIGHT) else value - 1
+                if levels[n] < new_value:
+                    levels[n] = new_value
+                    touched.add(n)
+                    queue.append(n)
+
+    def _remove(self, levels, removal, requeue, is_sky, touched):
+        """
+        Clear every cell whose light came from the removed source; cells lit by
+        other sources are queued so they can spread back into the cleared area.
+        """
+        while removal:
+            i, value = removal.popleft()
+            for n, below in self._neighbours(i):
+                n_value = levels[n]
+                if n_value == 0:
+                    continue
+                if n_value < value or (is_sky and below and value == MAX_LIGHT and n_value == MAX_LIGHT):
+                    levels[n] = 0
+                    touched.add(n)
+                    removal.append((n, n_value))
+                    emission = 0 if is_sky else EMISSION[self._cell(n)]
+                    if emission:
+                        levels[n] = emission
+                        requeue.append(n)
+                else:
+                    requeue.append(n)
+
+    def _chunks_of(self, touched):
+        chunks = set()
+        for i in touched:
+            x, y = divmod(i, WORLD_HEIGHT)
+            # Solid neighbours take their shade from this cell, so include them.
+            for nx, ny in ((x, y), (x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < WORLD_WIDTH and 0 <= ny < WORLD_HEIGHT:
+                    chunks.add((nx // CHUNK_SIZE, ny // CHUNK_SIZE))
+        return chunks
+
+class ChunkShading:
+    """
+    Cached per-chunk darkness overlays built from a LightMap. Each chunk's
+    overlay is built once at one pixel per block and scaled to the tile size of
+    the zoom level being drawn; both are only rebuilt after an edit changes the
+    chunk's light, so drawing the lighting costs at most one blit per visible
+    chunk per frame. Fully lit chunks have no overlay and are skipped.
+    """
+    def __init__(self):
+        self.light_map = None
+        self.base = {}                  # (cx, cy) -> 1 pixel per block overlay, or None if fully lit
+        self.surfaces = OrderedDict()   # (cx, cy, tile pixels) -> overlay drawn to the screen, LRU order
+        self.surface_bytes = 0
+
+    def reset(self, light_map):
+        self.light_map = light_map
+        self.base.clear()
+        self.surfaces.clear()
+        self.surface_bytes = 0
+
+    def invalidate(self, chunks):
+        for chunk in chunks:
+            if chunk in self.base:
+                del self.base[chunk]
+                for key in [key for key in self.surfaces if key[:2] == chunk]:
+                    self._discard(key)
+
+    def _discard(self, key):
+        surface = self.surfaces.pop(key)
+        self.surface_bytes -= surface.get_width() * surface.get_height() * 4
+
+    def get(self, cx, cy, size=TILE_SIZE):
+        """
+        The chunk's overlay at size pixels per block, or None if it is fully lit.
+        """
+        key = (cx, cy, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if (cx, cy) not in self.base:
+            self.base[(cx, cy)] = self._build(cx, cy)
+        base = self.base[(cx, cy)]
+        if base is None:
+            return None
+        # Converted to the display's pixel format; blitting the RGBA layout
+        # frombuffer produces would take the slow per-pixel path.
+        surface = pygame.transform.scale(base, (base.get_width() * size, base.get_height() * size)).convert_alpha()
+        self.surfaces[key] = surface
+        self.surface_bytes += surface.get_width() * surface.get_height() * 4
+        while self.surface_bytes > SHADING_CACHE_BYTES and len(self.surfaces) > 1:
+            self._discard(next(iter(self.surfaces)))
+        return surface
+
+    def _build(self, cx, cy):
+        x0, y0 = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+        width = min(CHUNK_SIZE, WORLD_WIDTH - x0)
+        height = min(CHUNK_SIZE, WORLD_HEIGHT - y0)
+        # Black RGBA pixels; only the alpha byte of each one is set.
+        pixels = bytearray(width * height * 4)
+        light_map = self.light_map
+        for dx in range(width):
+            for dy in range(height):
+                pixels[(dy * width + dx) * 4 + 3] = SHADE_ALPHA[light_map.shade_level(x0 + dx, y0 + dy)]
+        if not any(pixels[3::4]):
+            return None
+        return pygame.image.frombuffer(bytes(pixels), (width, height), "RGBA")
+
+    def draw(self, screen, camera_x, camera_y, view_width, view_height, zoom=1):
+        size = tile_pixels(zoom)
+        chunk_world = CHUNK_SIZE * TILE_SIZE
+        cx_start = max(0, int(camera_x // chunk_world))
+        cx_end = min((WORLD_WIDTH - 1) // CHUNK_SIZE, int((camera_x + view_width / zoom) // chunk_world))
+        cy_start = max(0, int(camera_y // chunk_world))
+        cy_end = min((WORLD_HEIGHT - 1) // CHUNK_SIZE, int((camera_y + view_height / zoom) // chunk_world))
+        offset_x = int(camera_x * zoom)
+        offset_y = int(camera_y * zoom)
+        for cx in range(cx_start, cx_end + 1):
+            for cy in range(cy_start, cy_end + 1):
+                surface = self.get(cx, cy, size)
+                if surface is not None:
+                    screen.blit(surface, (cx * CHUNK_SIZE * size - offset_x, cy * CHUNK_SIZE * size - offset_y))
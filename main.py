@@ -1,26 +1,23 @@
 # main.py
 import pygame, sys, math, os, time, random
 from config import *  # Assumes WIDTH, HEIGHT, TILE_SIZE, WORLD_WIDTH, WORLD_HEIGHT, default_inventory, etc.
-from world import generate_world, generate_structures
-from collision import horizontal_collision, vertical_collision
+from world import SurfaceIndex
+from collision import step_player
+from net_client import NetClient, parse_address
+from lighting import LightMap, ChunkShading
+from world_render import ChunkImages, draw_tiles
+from block_updates import BlockUpdateScheduler
+from entities import EntityManager
+from pathfinding import Pathfinder
+from crafting import Inventory, CraftingIndex
+from block_entities import BlockEntityStore
+from world_loader import WorldJob, WorldPool
+from world_cache import WorldCache
+from recording import LiveInput, Recorder, Replay, FrameStats, state_digest
 
 # ==================================================
-# New Item/Block IDs for Crafting & Chests
+# Crafting
 # ==================================================
-# (If not already defined in config.py, define here.)
-try:
-    CHEST
-except NameError:
-    CHEST = 10  # New block type: chest
-try:
-    STICK
-except NameError:
-    STICK = 11  # Crafted item: stick
-try:
-    WOOD_PLANK
-except NameError:
-    WOOD_PLANK = 12  # Crafted item: wood plank
-
 # Define a sample crafting recipe dictionary.
 # Keys are output IDs; values are dicts of required {item_id: quantity}.
 crafting_recipes = {
@@ -29,6 +26,9 @@ crafting_recipes = {
     CHEST: {WOOD_PLANK: 8}  # Craft a chest from 8 wood planks.
 }
 
+# Craftable recipes for the current inventory, updated as item counts change.
+crafting = CraftingIndex(crafting_recipes)
+
 # ==================================================
 # World Save/Load Helpers
 # ==================================================
@@ -58,9 +58,12 @@ def load_world_save(slot):
             col.append(world_data_flat[idx])
             idx += 1
         world_data.append(col)
-    return {"name": world_name, "seed": seed, "gamemode": gamemode, "world": world_data, "terrain_heights": terrain_data[:WORLD_WIDTH]}
+    # Saves from before chests had their own contents have no sixth line.
+    block_entity_data = lines[5] if len(lines) > 5 else ""
+    return {"name": world_name, "seed": seed, "gamemode": gamemode, "world": world_data, "terrain_heights": terrain_data[:WORLD_WIDTH],
+            "block_entities": block_entity_data}
 
-def save_world_save(slot, world_data, terrain_heights, world_name, seed, gamemode):
+def save_world_save(slot, world_data, terrain_heights, world_name, seed, gamemode, block_entity_data=""):
     filename = get_save_filename(slot)
     flat = []
     for x in range(WORLD_WIDTH):
@@ -74,42 +77,35 @@ def save_world_save(slot, world_data, terrain_heights, world_name, seed, gamemod
         f.write(gamemode + "\n")
         f.write(flat_str + "\n")
         f.write(terrain_str + "\n")
+        f.write(block_entity_data + "\n")
 
 # ==================================================
 # World Generation Helpers
 # ==================================================
-def reset_world_world(seed=""):
-    w, th = generate_world(seed)
-    generate_structures(w, th)
-    spawn_x = (WORLD_WIDTH // 2) * TILE_SIZE
-    surface_y = th[WORLD_WIDTH // 2]
-    # Ensure spawn is free.
-    x_mid = WORLD_WIDTH // 2
-    y_pos = surface_y - 1
-    while y_pos >= 0 and w[x_mid][y_pos] != AIR:
-        y_pos -= 1
-    if y_pos < 0:
-        y_pos = surface_y - 1
-    spawn_y = y_pos * TILE_SIZE
-    inv = default_inventory.copy()
-    return w, th, spawn_x, spawn_y, inv
-
-def reset_world():
+# Random-seed worlds generated ahead of time so "create" without a seed is instant.
+world_pool = None
+
+# Seeded worlds generated before are loaded from disk instead of regenerated.
+world_cache = WorldCache()
+
+# The world being generated while state == "loading", and the save slot it is for.
+loading_job = None
+loading_save = None
+
+def start_world_creation(slot, name, seed, gamemode):
     """
-    Create a new world (for respawn without seed input).
+    Generate the new world in the background and show the loading screen;
+    the main loop switches to the game when the job is done.
     """
-    w, th = generate_world()
-    generate_structures(w, th)
-    spawn_x = (WORLD_WIDTH // 2) * TILE_SIZE
-    surface_y = th[WORLD_WIDTH // 2]
-    spawn_y = (surface_y - 1) * TILE_SIZE
-    inv = default_inventory.copy()
-    return w, th, spawn_x, spawn_y, inv
+    global loading_job, loading_save, state
+    loading_job = world_pool.take() if seed == "" else WorldJob(seed, world_cache, prepare_world)
+    loading_save = (slot, name, seed, gamemode)
+    state = "loading"
 
 # ==================================================
 # Menu State Variables & Settings
 # ==================================================
-state = "menu"  # possible states: "menu", "settings", "world_selection", "new_world", "credits", "in_game", "inventory", "chest"
+state = "menu"  # possible states: "menu", "settings", "world_selection", "new_world", "loading", "credits", "in_game", "inventory", "chest"
 current_resolution = (WIDTH, HEIGHT)
 selected_save_slot = 0
 
@@ -143,6 +139,31 @@ player_height = TILE_SIZE
 camera_x = 0
 camera_y = 0
 CAMERA_SMOOTHING = 0.1
+zoom_index = 0
+zoom = ZOOM_LEVELS[zoom_index]  # screen pixels per world pixel
+
+# Networked mode (python main.py --connect host[:port]); None when playing single-player.
+net_client = None
+remote_player_color = (0, 0, 255)
+
+# Lighting for the current world and its cached per-chunk shading overlays.
+light_map = None
+chunk_shading = ChunkShading()
+# Downsampled chunk images for zoomed-out views.
+chunk_images = ChunkImages()
+
+# Surface height of every column (terrain_heights is its list of heights).
+surface_index = None
+
+# Falling sand / flowing water simulation for the current world.
+block_updates = None
+
+# Mobs, dropped items and projectiles in the current world.
+entities = None
+mob_spawn_timer = 0
+
+# Cached mob paths for the current world.
+pathfinder = None
 
 # Debug toggles.
 show_stats = False  # F1 toggles stats display
@@ -154,8 +175,112 @@ interact_message = ""
 interact_message_time = 0
 
 # Chest mechanic:
-# For simplicity, when the player interacts (F) on a chest block, we open a chest UI.
-chest_inventory = {item: 0 for item in default_inventory}  #  simple chest inventory
+# Every chest keeps its own contents in block_entities; open_chest is the (x, y)
+# of the chest whose UI is open.
+block_entities = None
+open_chest = None
+
+# The save slot the current world came from: (slot, name, seed, gamemode), or None.
+current_save = None
+
+# ==================================================
+# World Edit Helpers
+# ==================================================
+def prepare_world(world, terrain_heights):
+    """
+    The expensive state derived from a world's blocks (surface heights, light
+    and pending block updates). World jobs run this on their thread, so a new
+    world is ready to play without a hitch when the job finishes.
+    """
+    block_updates = BlockUpdateScheduler(world, set_block)
+    block_updates.seed_world()
+    return {"surface_index": SurfaceIndex(world), "light_map": LightMap(world), "block_updates": block_updates}
+
+def on_world_loaded(block_entity_data="", prepared=None):
+    """
+    Rebuild everything derived from world_data after a world is created or loaded.
+    block_entity_data is the saved chest contents, if any; prepared is
+    prepare_world(world_data, ...) if it has been run already.
+    """
+    global light_map, block_updates, surface_index, terrain_heights, entities, pathfinder, block_entities
+    if prepared is None:
+        prepared = prepare_world(world_data, terrain_heights)
+    block_entities = BlockEntityStore(block_entity_data)
+    # Saved heights may predate later edits, so they are rebuilt from the blocks.
+    surface_index = prepared["surface_index"]
+    terrain_heights = surface_index.heights
+    light_map = prepared["light_map"]
+    chunk_shading.reset(light_map)
+    chunk_images.reset(world_data)
+    block_updates = prepared["block_updates"]
+    pathfinder = Pathfinder(world_data)
+    entities = EntityManager(world_data, pathfinder)
+
+def on_block_changed(x, y, old_block, new_block):
+    """
+    Keep everything derived from world_data in sync after a single block edit.
+    """
+    if old_block == new_block:
+        return
+    if surface_index is not None:
+        surface_index.on_block_changed(x, y, old_block, new_block)
+    if light_map is not None:
+        chunk_shading.invalidate(light_map.on_block_changed(x, y, old_block, new_block))
+        chunk_images.invalidate(x // CHUNK_SIZE, y // CHUNK_SIZE)
+    if block_updates is not None:
+        block_updates.schedule_around(x, y)
+    if pathfinder is not None:
+        pathfinder.invalidate(x, y)
+    if block_entities is not None:
+        spilled = block_entities.on_block_changed(x, y, old_block, new_block)
+        if spilled and entities is not None:
+            # A broken chest drops what was inside it.
+            for item, count in spilled.items():
+                if count > 0:
+                    entities.spawn_item((x + 0.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE, item, count, vy=-150)
+
+def set_block(x, y, block):
+    old_block = world_data[x][y]
+    world_data[x][y] = block
+    on_block_changed(x, y, old_block, block)
+
+def save_current_world():
+    """
+    Write the world being played back to the save slot it came from.
+    """
+    if current_save is not None and net_client is None:
+        slot, name, seed, gamemode = current_save
+        save_world_save(slot, world_data, terrain_heights, name, seed, gamemode, block_entities.serialize())
+
+def screen_to_world(screen_x, screen_y):
+    """
+    World pixel coordinates under a screen position at the current camera and zoom.
+    """
+    return screen_x / zoom + camera_x, screen_y / zoom + camera_y
+
+def world_to_screen_rect(x, y, width, height):
+    return pygame.Rect(int((x - camera_x) * zoom), int((y - camera_y) * zoom),
+                       max(1, int(width * zoom)), max(1, int(height * zoom)))
+
+# ==================================================
+# Session Recording
+# ==================================================
+# python main.py --record <file> [--seed <seed>] starts a new survival world from
+# the seed and records every frame's input; python replay.py <file> plays it
+# back headless and prints frame times per state.
+MOVEMENT_KEYS = (pygame.K_a, pygame.K_d, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_w, pygame.K_UP, pygame.K_SPACE)
+recorder = None
+replay = None
+frame_stats = None
+session_seed = None
+if "--replay" in sys.argv[:-1]:
+    replay = Replay(sys.argv[sys.argv.index("--replay") + 1])
+    session_seed = replay.seed
+    current_resolution = replay.resolution
+    frame_stats = FrameStats()
+elif "--record" in sys.argv[:-1]:
+    session_seed = sys.argv[sys.argv.index("--seed") + 1] if "--seed" in sys.argv[:-1] else str(random.randrange(10**9))
+    recorder = Recorder(sys.argv[sys.argv.index("--record") + 1], session_seed, current_resolution, MOVEMENT_KEYS)
 
 # ==================================================
 # Pygame Initialization
@@ -166,6 +291,33 @@ font = pygame.font.SysFont(None, 24)
 screen = pygame.display.set_mode(current_resolution)
 pygame.display.set_caption("2DCraft")
 clock = pygame.time.Clock()
+# Where each frame's events, mouse and keyboard state come from.
+session_input = replay if replay is not None else LiveInput(clock, 60, recorder)
+
+if "--connect" in sys.argv:
+    arg_index = sys.argv.index("--connect") + 1
+    address = sys.argv[arg_index] if arg_index < len(sys.argv) else ""
+    player_name = sys.argv[sys.argv.index("--name") + 1] if "--name" in sys.argv[:-1] else None
+    net_client = NetClient(*parse_address(address), name=player_name)
+    world_data, terrain_heights = net_client.connect()
+    net_client.on_block_change = on_block_changed
+    on_world_loaded()
+    player_x, player_y = surface_index.spawn_position()
+    inventory = Inventory(default_inventory)
+    game_mode = "survival"
+    state = "in_game"
+elif session_seed is not None:
+    # Recorded sessions: the same world and random numbers every time.
+    random.seed(session_seed)
+    world_data, terrain_heights = world_cache.generate(session_seed)
+    on_world_loaded()
+    player_x, player_y = surface_index.spawn_position()
+    inventory = Inventory(default_inventory)
+    game_mode = "survival"
+    state = "in_game"
+    world_pool = WorldPool(0)
+else:
+    world_pool = WorldPool(prepare=prepare_world)
 
 # ==================================================
 # Menu Drawing Functions
@@ -235,6 +387,18 @@ def draw_credits_menu():
     screen.blit(bt, (back_rect.x + (back_rect.width - bt.get_width())//2, back_rect.y + (back_rect.height - bt.get_height())//2))
     return [("back", back_rect)]
 
+def draw_loading_screen(progress):
+    """
+    Progress bar shown while a new world is generated in the background.
+    """
+    screen.fill((0,0,0))
+    title = font.render("Generating world...", True, (255,255,255))
+    screen.blit(title, (current_resolution[0]//2 - title.get_width()//2, current_resolution[1]//2 - 50))
+    bar_rect = pygame.Rect(current_resolution[0]//2 - 150, current_resolution[1]//2 - 10, 300, 20)
+    pygame.draw.rect(screen, (100,100,100), bar_rect)
+    pygame.draw.rect(screen, (0,155,0), (bar_rect.x, bar_rect.y, int(bar_rect.width * progress), bar_rect.height))
+    pygame.draw.rect(screen, (255,255,255), bar_rect, 2)
+
 def draw_world_selection_menu():
     screen.fill((0,0,0))
     title = font.render("World Selection", True, (255,255,255))
@@ -292,7 +456,8 @@ def draw_inventory_ui():
     """
     Draw the inventory and crafting panels.
     Left panel: player's inventory.
-    Right panel: available crafting recipes (only those you can craft).
+    Right panel: available crafting recipes (only those you can craft). Click
+    a recipe to craft one, shift-click to craft as many as possible.
     """
     inv_panel = pygame.Rect(50, 50, current_resolution[0]//2 - 100, current_resolution[1] - 100)
     craft_panel = pygame.Rect(current_resolution[0]//2 + 50, 50, current_resolution[0]//2 - 100, current_resolution[1] - 100)
@@ -319,31 +484,26 @@ def draw_inventory_ui():
         count = inventory.get(item, 0)
         t = font.render(str(count), True, (255,255,255))
         screen.blit(t, (slot_rect.x+2, slot_rect.y+2))
-    # Draw available crafting recipes.
-    available_recipes = []
-    for output, req in crafting_recipes.items():
-        can_craft = True
-        for r_item, amount in req.items():
-            if inventory.get(r_item, 0) < amount:
-                can_craft = False
-                break
-        if can_craft:
-            available_recipes.append((output, req))
-    # List recipes vertically.
+    # Draw craftable recipes (including ones that need intermediate crafts).
+    crafting.attach(inventory)
+    recipe_rects = []
     y_offset = craft_panel.y + 50
-    for (output, req) in available_recipes:
-        req_text = ", ".join([f"{r}:{req[r]}" for r in req])
-        recipe_str = f"Craft {output}  ({req_text})"
+    for output in crafting.craftable():
+        req = crafting_recipes[output]
+        req_text = ", ".join([f"{registry.names[r]}:{req[r]}" for r in req])
+        recipe_str = f"Craft {registry.names[output]}  ({req_text})  max {crafting.max_craftable(output)}"
         t = font.render(recipe_str, True, (255,255,255))
         screen.blit(t, (craft_panel.x + 10, y_offset))
+        recipe_rects.append((output, pygame.Rect(craft_panel.x + 5, y_offset - 2, craft_panel.width - 10, 25)))
         y_offset += 30
-    return inv_panel, craft_panel
+    return inv_panel, craft_panel, recipe_rects
 
 def draw_chest_ui():
     """
-    Draw a simple chest UI.
+    Draw a simple chest UI for the open chest.
     Chest inventory is a 3x3 grid.
     """
+    stacks = [(item, count) for item, count in block_entities.get(*open_chest).items() if count > 0]
     chest_panel = pygame.Rect(current_resolution[0]//2 - 150, current_resolution[1]//2 - 150, 300, 300)
     pygame.draw.rect(screen, (50,50,50), chest_panel)
     pygame.draw.rect(screen, (255,255,255), chest_panel, 2)
@@ -360,26 +520,31 @@ def draw_chest_ui():
                                slot_size, slot_size)
             pygame.draw.rect(screen, (100,100,100), rect)
             pygame.draw.rect(screen, (255,255,255), rect, 2)
+            if len(grid) < len(stacks):
+                item, count = stacks[len(grid)]
+                pygame.draw.rect(screen, COLOR[item], rect.inflate(-14, -14))
+                t = font.render(str(count), True, (255,255,255))
+                screen.blit(t, (rect.x+3, rect.y+3))
             grid.append(rect)
     return chest_panel, grid
 
-# ============================
-# In-Game World Reset (with seed)
-# ============================
-def reset_world_using_seed(seed=""):
-    return reset_world_world(seed)
-
 # ==================================================
 # Main Loop
 # ==================================================
 running = True
 while running:
-    dt = clock.tick(60) / 1000.0  # delta time (seconds)
+    frame = session_input.next_frame()
+    if frame is None:
+        # The replay has run out.
+        break
+    dt = frame.dt  # delta time (seconds)
+    frame_state = state
+    frame_start = time.perf_counter()
     
     # ------------------------------
     # Event Handling
     # ------------------------------
-    for event in pygame.event.get():
+    for event in frame.events:
         if event.type == pygame.QUIT:
             running = False
         
@@ -396,7 +561,7 @@ while running:
         if state == "menu":
             if event.type == pygame.MOUSEBUTTONDOWN:
                 buttons = draw_main_menu()
-                mx, my = pygame.mouse.get_pos()
+                mx, my = frame.mouse_pos
                 for text, rect in buttons:
                     if rect.collidepoint(mx, my):
                         if text == "Play":
@@ -413,7 +578,7 @@ while running:
         elif state == "settings":
             if event.type == pygame.MOUSEBUTTONDOWN:
                 inputs, save_btn, back_btn = draw_settings_menu()
-                mx, my = pygame.mouse.get_pos()
+                mx, my = frame.mouse_pos
                 # Check inputs (for simplicity, we treat them as non-editable; you can extend with text input handling)
                 if save_btn[1].collidepoint(mx, my):
                     try:
@@ -444,7 +609,7 @@ while running:
         elif state == "world_selection":
             if event.type == pygame.MOUSEBUTTONDOWN:
                 slots, back_btn = draw_world_selection_menu()
-                mx, my = pygame.mouse.get_pos()
+                mx, my = frame.mouse_pos
                 for slot, rect, text in slots:
                     if rect.collidepoint(mx, my):
                         selected_save_slot = slot
@@ -454,11 +619,11 @@ while running:
                         else:
                             world_data = save_data["world"]
                             terrain_heights = save_data["terrain_heights"]
+                            on_world_loaded(save_data["block_entities"])
                             game_mode = save_data["gamemode"]
-                            player_x = (WORLD_WIDTH // 2) * TILE_SIZE
-                            surface_y = terrain_heights[WORLD_WIDTH // 2]
-                            player_y = (surface_y - 1) * TILE_SIZE
-                            inventory = default_inventory.copy()
+                            current_save = (slot, save_data["name"], save_data["seed"], game_mode)
+                            player_x, player_y = surface_index.spawn_position()
+                            inventory = Inventory(default_inventory)
                             state = "in_game"
                 if back_btn[1].collidepoint(mx, my):
                     state = "menu"
@@ -466,7 +631,7 @@ while running:
         elif state == "new_world":
             if event.type == pygame.MOUSEBUTTONDOWN:
                 wn_rect, seed_rect, mode_rect, create_btn, back_btn = draw_new_world_menu()
-                mx, my = pygame.mouse.get_pos()
+                mx, my = frame.mouse_pos
                 if wn_rect.collidepoint(mx, my):
                     active_field = "name"
                 elif seed_rect.collidepoint(mx, my):
@@ -474,10 +639,7 @@ while running:
                 elif mode_rect.collidepoint(mx, my):
                     new_gamemode = "creative" if new_gamemode == "survival" else "survival"
                 elif create_btn[1].collidepoint(mx, my):
-                    game_mode = new_gamemode
-                    world_data, terrain_heights, player_x, player_y, inventory = reset_world_using_seed(new_seed)
-                    save_world_save(selected_save_slot, world_data, terrain_heights, new_world_name, new_seed, new_gamemode)
-                    state = "in_game"
+                    start_world_creation(selected_save_slot, new_world_name, new_seed, new_gamemode)
                 elif back_btn[1].collidepoint(mx, my):
                     state = "world_selection"
             if event.type == pygame.KEYDOWN:
@@ -493,6 +655,9 @@ while running:
                         new_seed += event.unicode
         
         elif state == "in_game":
+            if event.type == pygame.MOUSEWHEEL:
+                # Scroll through every hotbar slot (the number keys only reach ten).
+                selected_slot = (selected_slot - event.y) % len(inventory_order)
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_F1:
                     show_stats = not show_stats
@@ -512,45 +677,101 @@ while running:
                     selected_slot = 5
                 elif event.key == pygame.K_7:
                     selected_slot = 6
+                elif event.key == pygame.K_8:
+                    selected_slot = 7
+                elif event.key == pygame.K_9:
+                    selected_slot = 8
+                elif event.key == pygame.K_0:
+                    selected_slot = 9
                 elif event.key == pygame.K_ESCAPE:
+                    save_current_world()
                     state = "menu"
                 elif event.key == pygame.K_e:
                     state = "inventory"
+                elif event.key == pygame.K_MINUS:
+                    zoom_index = min(zoom_index + 1, len(ZOOM_LEVELS) - 1)
+                    zoom = ZOOM_LEVELS[zoom_index]
+                elif event.key == pygame.K_EQUALS:
+                    zoom_index = max(zoom_index - 1, 0)
+                    zoom = ZOOM_LEVELS[zoom_index]
+                elif event.key == pygame.K_q:
+                    # Throw one of the selected item toward the mouse.
+                    item = inventory_order[selected_slot]
+                    if inventory.get(item, 0) > 0:
+                        inventory[item] -= 1
+                        mouse_x, mouse_y = screen_to_world(*frame.mouse_pos)
+                        throw_dir = 1 if mouse_x >= player_x else -1
+                        entities.spawn_item(player_x + player_width / 2, player_y + player_height / 3,
+                                            item, vx=throw_dir * 250, vy=-200)
+                elif event.key == pygame.K_r:
+                    # Fire a stick toward the mouse (free in creative).
+                    if game_mode == "creative" or inventory.get(STICK, 0) > 0:
+                        if game_mode != "creative":
+                            inventory[STICK] -= 1
+                        mouse_x, mouse_y = screen_to_world(*frame.mouse_pos)
+                        entities.spawn_projectile(player_x + player_width / 2, player_y + player_height / 3,
+                                                  mouse_x, mouse_y, STICK)
                 elif event.key == pygame.K_f:
-                    # Interact: if the block at player's feet is a chest, open chest UI.
+                    # Interact: open the chest under the mouse (within reach), else the one at the player's feet.
+                    mouse_x, mouse_y = screen_to_world(*frame.mouse_pos)
+                    mouse_tile_x = int((mouse_x) // TILE_SIZE)
+                    mouse_tile_y = int((mouse_y) // TILE_SIZE)
+                    in_reach = math.hypot(player_x + player_width/2 - (mouse_tile_x + 0.5) * TILE_SIZE,
+                                          player_y + player_height/2 - (mouse_tile_y + 0.5) * TILE_SIZE) <= 5 * TILE_SIZE
                     foot_x = int((player_x + player_width//2) // TILE_SIZE)
                     foot_y = int((player_y + player_height) // TILE_SIZE)
-                    if 0 <= foot_x < WORLD_WIDTH and 0 <= foot_y < WORLD_HEIGHT:
-                        if world_data[foot_x][foot_y] == CHEST:
-                            state = "chest"
+                    candidates = [(mouse_tile_x, mouse_tile_y), (foot_x, foot_y)] if in_reach else [(foot_x, foot_y)]
+                    open_chest = None
+                    for tx, ty in candidates:
+                        if 0 <= tx < WORLD_WIDTH and 0 <= ty < WORLD_HEIGHT and world_data[tx][ty] == CHEST:
+                            open_chest = (tx, ty)
+                            break
+                    if open_chest is not None:
+                        if block_entities.get(*open_chest) is None:
+                            # Chests from older saves start out empty.
+                            block_entities.create(*open_chest)
+                        state = "chest"
                     else:
                         interact_message = "Nothing to interact with!"
                         interact_message_time = time.time()
             if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                world_x = int((mouse_x + camera_x) // TILE_SIZE)
-                world_y = int((mouse_y + camera_y) // TILE_SIZE)
+                mouse_x, mouse_y = screen_to_world(*frame.mouse_pos)
+                world_x = int((mouse_x) // TILE_SIZE)
+                world_y = int((mouse_y) // TILE_SIZE)
                 player_center_x = player_x + player_width/2
                 player_center_y = player_y + player_height/2
                 block_center_x = world_x * TILE_SIZE + TILE_SIZE/2
                 block_center_y = world_y * TILE_SIZE + TILE_SIZE/2
-                if math.hypot(player_center_x - block_center_x, player_center_y - block_center_y) <= 5 * TILE_SIZE:
+                target_mob = entities.mob_at(mouse_x, mouse_y) if event.button == 1 else None
+                if target_mob is not None:
+                    mob_x, mob_y = target_mob.center()
+                    if math.hypot(player_center_x - mob_x, player_center_y - mob_y) <= 2 * TILE_SIZE:
+                        entities.damage(target_mob, PLAYER_DAMAGE)
+                elif math.hypot(player_center_x - block_center_x, player_center_y - block_center_y) <= 5 * TILE_SIZE:
                     if 0 <= world_x < WORLD_WIDTH and 0 <= world_y < WORLD_HEIGHT:
-                        if event.button == 1:
-                            if world_data[world_x][world_y] != AIR:
+                        if event.button == 1 and net_client is not None:
+                            net_client.break_block(world_data, inventory, world_x, world_y)
+                        elif event.button == 3 and net_client is not None:
+                            player_rect = pygame.Rect(player_x, player_y, player_width, player_height)
+                            block_rect = pygame.Rect(world_x * TILE_SIZE, world_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                            if not player_rect.colliderect(block_rect):
+                                net_client.place_block(world_data, inventory, world_x, world_y, inventory_order[selected_slot])
+                        elif event.button == 1:
+                            if SOLID[world_data[world_x][world_y]]:
                                 block_type = world_data[world_x][world_y]
-                                inventory[block_type] = inventory.get(block_type, 0) + 1
-                                world_data[world_x][world_y] = AIR
+                                set_block(world_x, world_y, AIR)
+                                # Broken blocks drop as items that are picked up by walking near them.
+                                entities.spawn_item(block_center_x, block_center_y, block_type, vy=-150)
                         elif event.button == 3:
                             block_to_place = inventory_order[selected_slot]
                             player_rect = pygame.Rect(player_x, player_y, player_width, player_height)
                             block_rect = pygame.Rect(world_x * TILE_SIZE, world_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                            if not player_rect.colliderect(block_rect):
+                            if not player_rect.colliderect(block_rect) and PLACEABLE[block_to_place]:
                                 if game_mode == "creative":
-                                    world_data[world_x][world_y] = block_to_place
+                                    set_block(world_x, world_y, block_to_place)
                                 else:
-                                    if inventory.get(block_to_place, 0) > 0 and world_data[world_x][world_y] == AIR:
-                                        world_data[world_x][world_y] = block_to_place
+                                    if inventory.get(block_to_place, 0) > 0 and not SOLID[world_data[world_x][world_y]]:
+                                        set_block(world_x, world_y, block_to_place)
                                         inventory[block_to_place] -= 1
         
         elif state == "inventory":
@@ -559,32 +780,25 @@ while running:
                     state = "in_game"
             if event.type == pygame.MOUSEBUTTONDOWN:
                 # In inventory UI, check if a crafting recipe is clicked.
-                mx, my = pygame.mouse.get_pos()
-                # For simplicity, assume recipes are listed in a column on the right.
-                recipe_y = current_resolution[1]//2
-                idx = 0
-                for output, req in crafting_recipes.items():
-                    rect = pygame.Rect(current_resolution[0] - 250, recipe_y + idx*30, 240, 25)
+                mx, my = frame.mouse_pos
+                inv_panel, craft_panel, recipe_rects = draw_inventory_ui()
+                for output, rect in recipe_rects:
                     if rect.collidepoint(mx, my):
-                        # Craft this recipe: subtract required resources, add the output.
-                        can_craft = True
-                        for r_item, amt in req.items():
-                            if inventory.get(r_item, 0) < amt:
-                                can_craft = False
-                                break
-                        if can_craft:
-                            for r_item, amt in req.items():
-                                inventory[r_item] -= amt
-                            inventory[output] = inventory.get(output, 0) + 1
-                    idx += 1
+                        # Intermediate crafts (e.g. planks for a chest) happen automatically.
+                        if frame.mods & pygame.KMOD_SHIFT:
+                            crafting.craft_max(output)
+                        else:
+                            crafting.craft(output)
+                        break
 
         elif state == "chest":
             # In chest UI, allow transferring items.
+            chest_contents = block_entities.get(*open_chest)
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     state = "in_game"
             if event.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
+                mx, my = frame.mouse_pos
                 # We'll draw chest UI grid; detect clicks.
                 chest_panel, grid = draw_chest_ui()
                 for rect in grid:
@@ -594,14 +808,14 @@ while running:
                         item = inventory_order[selected_slot]
                         if inventory.get(item, 0) > 0:
                             inventory[item] -= 1
-                            chest_inventory[item] = chest_inventory.get(item, 0) + 1
+                            chest_contents[item] = chest_contents.get(item, 0) + 1
             # Pressing 'C' will transfer one unit from chest back to player's inventory.
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_c:
                     # For simplicity, transfer from first nonzero chest slot.
-                    for item, amt in chest_inventory.items():
+                    for item, amt in chest_contents.items():
                         if amt > 0:
-                            chest_inventory[item] -= 1
+                            chest_contents[item] -= 1
                             inventory[item] = inventory.get(item, 0) + 1
                             break
 
@@ -623,39 +837,53 @@ while running:
     elif state == "new_world":
         draw_new_world_menu()
         pygame.display.flip()
+    elif state == "loading":
+        if loading_job.done:
+            world_data, terrain_heights = loading_job.result()
+            on_world_loaded(prepared=loading_job.prepared)
+            player_x, player_y = surface_index.spawn_position()
+            inventory = Inventory(default_inventory)
+            current_save = loading_save
+            game_mode = current_save[3]
+            save_current_world()
+            loading_job = None
+            state = "in_game"
+        else:
+            draw_loading_screen(loading_job.progress)
+            pygame.display.flip()
     elif state == "in_game":
         # Game movement & collision.
-        keys = pygame.key.get_pressed()
-        dx = 0
+        keys = frame.keys
+        direction = 0
         if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            dx = -MOVE_SPEED * dt
+            direction = -1
         if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            dx = MOVE_SPEED * dt
-        new_px = horizontal_collision(player_x, player_y, dx, player_width, player_height, world_data)
-        if new_px == player_x:
-            dx = 0
-        player_x = new_px
-        if (keys[pygame.K_w] or keys[pygame.K_UP] or keys[pygame.K_SPACE]) and on_ground:
-            player_vel_y = JUMP_VELOCITY
-            on_ground = False
+            direction = 1
+        jump = keys[pygame.K_w] or keys[pygame.K_UP] or keys[pygame.K_SPACE]
+        if jump and on_ground:
             fall_start_y = None
-        player_vel_y += GRAVITY * dt
-        if not on_ground and player_vel_y > 0 and fall_start_y is None:
-            fall_start_y = player_y
-        new_py, landed = vertical_collision(player_x, player_y, player_vel_y * dt, player_width, player_height, world_data)
-        if landed:
-            if fall_start_y is not None:
-                fall_distance = new_py - fall_start_y
-                fall_distance_blocks = fall_distance / TILE_SIZE
-                if fall_distance_blocks > FALL_SAFE_HEIGHT:
-                    damage = int((fall_distance_blocks - FALL_SAFE_HEIGHT) * FALL_DAMAGE_PER_BLOCK)
-                    player_health -= damage
-                fall_start_y = None
-            player_vel_y = 0
-            on_ground = True
+        if net_client is not None:
+            # Correct the prediction with the latest server state, then predict this frame.
+            player_x, player_y, player_vel_y, on_ground = net_client.poll(
+                player_x, player_y, player_vel_y, on_ground, player_width, player_height, world_data, inventory)
+            if net_client.restored_health is not None:
+                player_health, net_client.restored_health = net_client.restored_health, None
+            prev_y = player_y
+            player_x, player_y, player_vel_y, on_ground, landed = net_client.predict(
+                player_x, player_y, player_vel_y, on_ground, direction, jump, dt, player_width, player_height, world_data)
         else:
-            on_ground = False
-        player_y = new_py
+            prev_y = player_y
+            player_x, player_y, player_vel_y, on_ground, landed = step_player(
+                player_x, player_y, player_vel_y, on_ground, direction, jump, dt, player_width, player_height, world_data)
+        if not on_ground and player_vel_y > 0 and fall_start_y is None:
+            fall_start_y = prev_y
+        if landed and fall_start_y is not None:
+            fall_distance = player_y - fall_start_y
+            fall_distance_blocks = fall_distance / TILE_SIZE
+            if fall_distance_blocks > FALL_SAFE_HEIGHT:
+                damage = int((fall_distance_blocks - FALL_SAFE_HEIGHT) * FALL_DAMAGE_PER_BLOCK)
+                player_health -= damage
+            fall_start_y = None
         if player_y > WORLD_HEIGHT * TILE_SIZE:
             player_health = 0
         if player_health < MAX_HEALTH:
@@ -666,31 +894,54 @@ while running:
                     player_health = MAX_HEALTH
                 regen_timer = 0
         if player_health <= 0:
-            world_data, terrain_heights, player_x, player_y, inventory = reset_world()
+            if net_client is not None:
+                # The server owns the world; it resets the player to spawn.
+                net_client.send("die")
+            # Respawn at the world spawn; the world itself is kept.
+            player_x, player_y = surface_index.spawn_position()
+            inventory = Inventory(default_inventory)
             player_vel_y = 0
             on_ground = False
             player_health = MAX_HEALTH
             fall_start_y = None
             regen_timer = 0
 
+        if net_client is None:
+            block_updates.update(dt)
+            block_entities.unload_far(int(player_x // (CHUNK_SIZE * TILE_SIZE)), int(player_y // (CHUNK_SIZE * TILE_SIZE)),
+                                      BLOCK_ENTITY_RADIUS)
+            mob_spawn_timer += dt
+            if mob_spawn_timer >= MOB_SPAWN_INTERVAL:
+                mob_spawn_timer = 0
+                if entities.mob_count < MAX_MOBS:
+                    # Spawn on the surface, just off screen.
+                    spawn_column = int(player_x // TILE_SIZE) + random.choice((-1, 1)) * random.randint(12, 20)
+                    if 0 <= spawn_column < WORLD_WIDTH:
+                        entities.spawn_mob(*surface_index.spawn_position(spawn_column))
+            # Recorded sessions plan every request, so paths never depend on machine speed.
+            pathfinder.update(None if session_input.deterministic else PATH_BUDGET)
+        player_health -= entities.update(dt, pygame.Rect(player_x, player_y, player_width, player_height), inventory)
+        if net_client is not None:
+            net_client.report_health(player_health)
+
         # Smooth camera movement.
-        target_camera_x = player_x - current_resolution[0] // 2 + player_width // 2
-        target_camera_y = player_y - current_resolution[1] // 2 + player_height // 2
+        target_camera_x = player_x + player_width / 2 - current_resolution[0] / 2 / zoom
+        target_camera_y = player_y + player_height / 2 - current_resolution[1] / 2 / zoom
         camera_x += (target_camera_x - camera_x) * CAMERA_SMOOTHING
         camera_y += (target_camera_y - camera_y) * CAMERA_SMOOTHING
 
         # Draw the game world.
-        screen.fill(colors[AIR])
-        for x in range(WORLD_WIDTH):
-            for y in range(WORLD_HEIGHT):
-                block_type = world_data[x][y]
-                if block_type != AIR:
-                    rect = pygame.Rect(x * TILE_SIZE - int(camera_x),
-                                       y * TILE_SIZE - int(camera_y),
-                                       TILE_SIZE, TILE_SIZE)
-                    pygame.draw.rect(screen, colors[block_type], rect)
-                    pygame.draw.rect(screen, (0,0,0), rect, 1)
-        player_rect = pygame.Rect(int(player_x - camera_x), int(player_y - camera_y), player_width, player_height)
+        screen.fill(COLOR[AIR])
+        if zoom > LOD_ZOOM:
+            draw_tiles(screen, world_data, camera_x, camera_y, current_resolution[0], current_resolution[1], zoom)
+        else:
+            chunk_images.draw(screen, camera_x, camera_y, current_resolution[0], current_resolution[1], zoom)
+        chunk_shading.draw(screen, camera_x, camera_y, current_resolution[0], current_resolution[1], zoom)
+        entities.draw(screen, camera_x, camera_y, current_resolution[0], current_resolution[1], zoom)
+        if net_client is not None:
+            for remote_x, remote_y in net_client.remote_positions():
+                pygame.draw.rect(screen, remote_player_color, world_to_screen_rect(remote_x, remote_y, player_width, player_height))
+        player_rect = world_to_screen_rect(player_x, player_y, player_width, player_height)
         pygame.draw.rect(screen, player_color, player_rect)
         # Draw Inventory Bar (at bottom center).
         inv_slot_size = 50
@@ -709,7 +960,7 @@ while running:
             if i == selected_slot:
                 pygame.draw.rect(screen, (255,255,0), srect, 3)
             inner = srect.inflate(-10, -10)
-            pygame.draw.rect(screen, colors[btype], inner)
+            pygame.draw.rect(screen, COLOR[btype], inner)
             ct = font.render(str(inventory.get(btype, 0)), True, (255,255,255))
             screen.blit(ct, (sx+5, sy+5))
         # Draw Health (Hearts) at top left.
@@ -732,7 +983,9 @@ while running:
                 f"Health: {player_health}",
                 f"Velocity Y: {int(player_vel_y)}",
                 f"Seed: {new_seed if new_seed != '' else 'N/A'}",
-                f"Gamemode: {game_mode}"
+                f"Gamemode: {game_mode}",
+                f"Active cells: {len(block_updates.scheduled) if block_updates else 0}",
+                f"Entities: {len(entities.entities)} ({entities.mob_count} mobs)"
             ]
             for i, line in enumerate(debug_lines):
                 dtext = font.render(line, True, (255,255,255))
@@ -743,7 +996,7 @@ while running:
             fps_rect = fps_text.get_rect(topright=(current_resolution[0] - 10, 10))
             screen.blit(fps_text, fps_rect)
         if inventory_open:
-            inv_panel, craft_panel = draw_inventory_ui()
+            inv_panel, craft_panel, recipe_rects = draw_inventory_ui()
         if interact_message and time.time() - interact_message_time < 1:
             im_text = font.render(interact_message, True, (255,255,0))
             screen.blit(im_text, (current_resolution[0]//2 - im_text.get_width()//2, current_resolution[1]//2))
@@ -752,7 +1005,7 @@ while running:
     elif state == "inventory":
         # Draw full-screen inventory/crafting UI.
         screen.fill((0,0,0))
-        inv_panel, craft_panel = draw_inventory_ui()
+        inv_panel, craft_panel, recipe_rects = draw_inventory_ui()
         # Allow closing with ESC or E.
         pygame.display.flip()
     
@@ -763,5 +1016,18 @@ while running:
         # (For simplicity, chest transfers are handled in event loop.)
         pygame.display.flip()
 
+    if frame_stats is not None:
+        frame_stats.add(frame_state, time.perf_counter() - frame_start)
+
+session_input.close()
+if frame_stats is not None:
+    print(frame_stats.report())
+    # replay.py --check compares this line between two replays.
+    print("final state:", state_digest(world_data, (player_x, player_y, player_vel_y, player_health),
+                                       inventory, entities.entities.values()))
+if state in ("in_game", "inventory", "chest"):
+    save_current_world()
+if net_client is not None:
+    net_client.close()
 pygame.quit()
 sys.exit()
@@ -0,0 +1,264 @@
+# net_client.py
+import socket
+import threading
+import queue
+import time
+from collections import deque
+from config import AIR, WORLD_WIDTH, WORLD_HEIGHT, SOLID, PLACEABLE
+from collision import step_player
+from shard import MAX_INPUT_DT
+
+DEFAULT_PORT = 25515
+INTERPOLATION_DELAY = 0.1   # seconds remote players are drawn behind the newest snapshot
+CLOCK_SAMPLES = 64          # recent snapshots used to estimate the server clock offset
+MAX_PENDING_INPUTS = 600    # unacknowledged inputs kept for replay (~10 s at 60 FPS)
+
+def parse_address(address):
+    """
+    Parse "host" or "host:port" into (host, port).
+    """
+    host, _, port = address.partition(":")
+    return host or "127.0.0.1", int(port) if port else DEFAULT_PORT
+
+class RemotePlayer:
+    """
+    Snapshot history of another player, keyed by server time and drawn slightly
+    in the past so there are always two snapshots to interpolate between.
+    """
+    def __init__(self):
+        self.snapshots = deque(maxlen=32)
+
+    def add(self, server_time, x, y):
+        self.snapshots.append((server_time, x, y))
+
+    def position(self, render_time):
+        snaps = self.snapshots
+        if render_time <= snaps[0][0]:
+            return snaps[0][1], snaps[0][2]
+        for i in range(len(snaps) - 1, 0, -1):
+            t0, x0, y0 = snaps[i - 1]
+            t1, x1, y1 = snaps[i]
+            if t0 <= render_time <= t1:
+                f = (render_time - t0) / (t1 - t0) if t1 > t0 else 1.0
+                return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+        # Newer than every snapshot: hold the latest position rather than extrapolate.
+        return snaps[-1][1], snaps[-1][2]
+
+class NetClient:
+    """
+    Connection to server.py. Socket reads and writes happen on background threads
+    so the render loop never blocks on the network; the main loop calls predict()
+    every frame and poll() to apply whatever arrived since the last frame.
+    """
+    def __init__(self, host, port=DEFAULT_PORT, name=None):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.sock = None
+        self.connected = False
+        self._outgoing = queue.Queue()
+        self._incoming = queue.Queue()
+        self.seq = 0
+        self.pending_inputs = deque()
+        self.pending_edits = {}   # (bx, by) -> (previous block, {item: inventory delta})
+        self.remote_players = {}
+        # Local receive time minus server send time for recent snapshots. The
+        # smallest is the least delayed, so it maps local time to server time
+        # without the network jitter.
+        self.clock_samples = deque(maxlen=CLOCK_SAMPLES)
+        self.on_block_change = None   # called with (x, y, old_block, new_block)
+        self.joined = False           # set once the server has sent our saved state
+        self.restored_health = None   # saved health for the main loop to apply, until it does
+        self.reported_health = None
+
+    # ------------------------------
+    # Connection
+    # ------------------------------
+    def connect(self, timeout=10):
+        """
+        Connect and wait for the server's world. Returns (world, terrain_heights).
+        """
+        self.sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = self.sock.makefile("r", encoding="utf-8")
+        line = reader.readline().split()
+        if len(line) != 5 or line[0] != "world":
+            raise ConnectionError("Server did not send a world")
+        width, height = int(line[1]), int(line[2])
+        if (width, height) != (WORLD_WIDTH, WORLD_HEIGHT):
+            raise ConnectionError(f"Server world is {width}x{height}, expected {WORLD_WIDTH}x{WORLD_HEIGHT}")
+        flat = list(map(int, line[3].split(",")))
+        world = [flat[x * WORLD_HEIGHT:(x + 1) * WORLD_HEIGHT] for x in range(WORLD_WIDTH)]
+        terrain_heights = list(map(int, line[4].split(",")))
+        self.sock.settimeout(None)
+        self.connected = True
+        if self.name:
+            # Logging in lets the server restore our saved position and inventory.
+            self.send(f"login {self.name}")
+        threading.Thread(target=self._recv_loop, args=(reader,), daemon=True).start()
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        return world, terrain_heights
+
+    def close(self):
+        self.connected = False
+        self._outgoing.put(None)
+        if self.sock is not None:
+            self.sock.close()
+
+    def send(self, text):
+        self._outgoing.put(text)
+
+    def _send_loop(self):
+        while True:
+            text = self._outgoing.get()
+            if text is None:
+                break
+            try:
+                self.sock.sendall((text + "\n").encode("utf-8"))
+            except OSError:
+                self.connected = False
+                break
+
+    def _recv_loop(self, reader):
+        try:
+            for line in reader:
+                self._incoming.put((time.perf_counter(), line.split()))
+        except OSError:
+            pass
+        self.connected = False
+
+    # ------------------------------
+    # Prediction & Reconciliation
+    # ------------------------------
+    def predict(self, x, y, vel_y, on_ground, direction, jump, dt, player_width, player_height, world):
+        """
+        Send this frame's input and apply it locally right away.
+        Returns the same tuple as step_player.
+        """
+        # Simulate with the same clamped, rounded dt the server applies.
+        dt = round(min(dt, MAX_INPUT_DT), 4)
+        self.seq += 1
+        self.pending_inputs.append((self.seq, direction, jump, dt))
+        if len(self.pending_inputs) > MAX_PENDING_INPUTS:
+            self.pending_inputs.popleft()
+        self.send(f"input {self.seq} {direction} {int(jump)} {dt:.4f}")
+        return step_player(x, y, vel_y, on_ground, direction, jump, dt, player_width, player_height, world)
+
+    def _reconcile(self, ack_seq, x, y, vel_y, on_ground, player_width, player_height, world):
+        """
+        Start from the server's authoritative state and replay the inputs it has
+        not applied yet.
+        """
+        while self.pending_inputs and self.pending_inputs[0][0] <= ack_seq:
+            self.pending_inputs.popleft()
+        for _, direction, jump, dt in self.pending_inputs:
+            x, y, vel_y, on_ground, _ = step_player(x, y, vel_y, on_ground, direction, jump, dt,
+                                                    player_width, player_height, world)
+        return x, y, vel_y, on_ground
+
+    def poll(self, x, y, vel_y, on_ground, player_width, player_height, world, inventory):
+        """
+        Apply every message received since the last frame: reconcile the local
+        player against the newest snapshot, record remote player positions and
+        apply block edits. Returns the corrected (x, y, vel_y, on_ground).
+        """
+        newest = None
+        while True:
+            try:
+                received_at, parts = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            if not parts:
+                continue
+            kind = parts[0]
+            if kind == "snap":
+                newest = parts
+                server_time = float(parts[1])
+                self.clock_samples.append(received_at - server_time)
+                self._record_remote_players(server_time, parts[7:])
+            elif kind == "you" and len(parts) in (4, 5):
+                # Our saved state, sent once after joining; an empty inventory
+                # leaves the last field out.
+                x, y = float(parts[1]), float(parts[2])
+                self.restored_health = self.reported_health = int(parts[3])
+                self.joined = True
+                inventory.clear()
+                for entry in parts[4].split(",") if len(parts) == 5 else ():
+                    item, count = entry.split(":")
+                    inventory[int(item)] = int(count)
+            elif kind == "set":
+                bx, by, block = int(parts[1]), int(parts[2]), int(parts[3])
+                self._set_block(world, bx, by, block)
+                self.pending_edits.pop((bx, by), None)
+            elif kind == "deny" and len(parts) == 4:
+                bx, by, block = int(parts[1]), int(parts[2]), int(parts[3])
+                self._set_block(world, bx, by, block)
+                edit = self.pending_edits.pop((bx, by), None)
+                if edit is not None:
+                    for item, delta in edit[1].items():
+                        inventory[item] = inventory.get(item, 0) - delta
+        if newest is not None:
+            ack_seq = int(newest[2])
+            x, y, vel_y, on_ground = self._reconcile(ack_seq, float(newest[3]), float(newest[4]),
+                                                     float(newest[5]), newest[6] == "1",
+                                                     player_width, player_height, world)
+        return x, y, vel_y, on_ground
+
+    def report_health(self, health):
+        """
+        Tell the server about a health change (damage, regeneration or respawn)
+        so it is saved with the player.
+        """
+        if self.joined and health != self.reported_health:
+            self.reported_health = health
+            self.send(f"health {health}")
+
+    def _record_remote_players(self, server_time, entries):
+        seen = set()
+        for entry in entries:
+            pid, px, py = entry.split(",")
+            seen.add(pid)
+            remote = self.remote_players.get(pid)
+            if remote is None:
+                remote = self.remote_players[pid] = RemotePlayer()
+            remote.add(server_time, float(px), float(py))
+        for pid in list(self.remote_players):
+            if pid not in seen:
+                del self.remote_players[pid]
+
+    def remote_positions(self):
+        if not self.clock_samples:
+            return []
+        # Server time now, minus the interpolation delay.
+        render_time = time.perf_counter() - min(self.clock_samples) - INTERPOLATION_DELAY
+        return [remote.position(render_time) for remote in self.remote_players.values()]
+
+    # ------------------------------
+    # Block Edits
+    # ------------------------------
+    def break_block(self, world, inventory, bx, by):
+        """
+        Break a block locally and ask the server to confirm it; a "deny" reply
+        restores the block and the inventory.
+        """
+        block = world[bx][by]
+        if not SOLID[block]:
+            return
+        inventory[block] = inventory.get(block, 0) + 1
+        self._set_block(world, bx, by, AIR)
+        self.pending_edits[(bx, by)] = (block, {block: 1})
+        self.send(f"break {bx} {by}")
+
+    def place_block(self, world, inventory, bx, by, block):
+        if not PLACEABLE[block] or inventory.get(block, 0) <= 0 or world[bx][by] != AIR:
+            return
+        inventory[block] -= 1
+        self._set_block(world, bx, by, block)
+        self.pending_edits[(bx, by)] = (AIR, {block: -1})
+        self.send(f"place {bx} {by} {block}")
+
+    def _set_block(self, world, bx, by, block):
+        old_block = world[bx][by]
+        world[bx][by] = block
+        if self.on_block_change is not None and old_block != block:
+            self.on_block_change(bx, by, old_block, block)
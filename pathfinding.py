@@ -0,0 +1,286 @@
+# pathfinding.py
+import heapq
+import time
+from collections import OrderedDict, deque
+from config import *
+
+# Highest step a jump can clear and the deepest drop taken without fall damage (in blocks).
+JUMP_HEIGHT = int((JUMP_VELOCITY ** 2) / (2 * GRAVITY) // TILE_SIZE)
+MAX_DROP = FALL_SAFE_HEIGHT
+
+PATH_CACHE_SIZE = 256
+
+# ==================================================
+# Tile Moves
+# ==================================================
+def _passable(world, x, y):
+    return 0 <= x < WORLD_WIDTH and 0 <= y < WORLD_HEIGHT and not SOLID[world[x][y]]
+
+def standable(world, x, y):
+    """
+    A one-block-tall walker can stand in (x, y): the cell is open and the one
+    below is solid.
+    """
+    return _passable(world, x, y) and y + 1 < WORLD_HEIGHT and SOLID[world[x][y + 1]]
+
+def moves(world, x, y):
+    """
+    Yield (nx, ny, cost) for every node reachable from the standable cell (x, y)
+    in one move: walking, jumping up to JUMP_HEIGHT onto a neighbouring column,
+    or dropping up to MAX_DROP off a ledge.
+    """
+    for nx in (x - 1, x + 1):
+        if not 0 <= nx < WORLD_WIDTH:
+            continue
+        if standable(world, nx, y):
+            yield nx, y, 1
+            continue
+        if _passable(world, nx, y):
+            # Walk off the ledge and fall.
+            ny = y + 1
+            while ny - y <= MAX_DROP and _passable(world, nx, ny):
+                if standable(world, nx, ny):
+                    yield nx, ny, 1 + (ny - y) * 0.5
+                    break
+                ny += 1
+            continue
+        # Blocked: jump onto the column if there is headroom above us.
+        for rise in range(1, JUMP_HEIGHT + 1):
+            if not _passable(world, x, y - rise):
+                break
+            if standable(world, nx, y - rise):
+                yield nx, y - rise, 1 + rise
+                break
+
+# ==================================================
+# Per-Chunk Navigation Graph
+# ==================================================
+class ChunkNav:
+    """
+    Navigation graph for the columns [cx * CHUNK_SIZE, (cx + 1) * CHUNK_SIZE).
+    Nodes in the chunk's two border columns are its entrances; the shortest
+    costs (and parents, for refining) between entrances are precomputed so the
+    high-level search can cross the chunk in one step.
+    """
+    def __init__(self, world, cx):
+        self.cx = cx
+        self.x_start = cx * CHUNK_SIZE
+        self.x_end = min(WORLD_WIDTH, self.x_start + CHUNK_SIZE)
+        self.edges = {}      # node -> [(node, cost)] inside the chunk
+        self.reverse = {}    # node -> [(node, cost)] inside the chunk, reversed
+        self.exits = {}      # node -> [(node, cost)] into neighbouring chunks
+        for x in range(self.x_start, self.x_end):
+            for y in range(WORLD_HEIGHT):
+                if standable(world, x, y):
+                    self.edges[(x, y)] = []
+                    self.reverse.setdefault((x, y), [])
+        for node in self.edges:
+            for nx, ny, cost in moves(world, *node):
+                if self.x_start <= nx < self.x_end:
+                    self.edges[node].append(((nx, ny), cost))
+                    self.reverse.setdefault((nx, ny), []).append((node, cost))
+                else:
+                    self.exits.setdefault(node, []).append(((nx, ny), cost))
+        self.entrances = [node for node in self.edges if node[0] in (self.x_start, self.x_end - 1)]
+        self.entrance_paths = {}
+        for entrance in self.entrances:
+            dist, parent = dijkstra(self.edges, {entrance: 0})
+            self.entrance_paths[entrance] = (dist, parent)
+
+    def contains(self, node):
+        return node in self.edges
+
+def dijkstra(edges, sources):
+    """
+    Shortest costs from the sources ({node: starting cost}) over an adjacency dict.
+    Returns (dist, parent).
+    """
+    dist = dict(sources)
+    parent = {node: None for node in sources}
+    heap = [(cost, node) for node, cost in sources.items()]
+    heapq.heapify(heap)
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > dist.get(node, float("inf")):
+            continue
+        for nxt, step in edges.get(node, ()):
+            new_cost = cost + step
+            if new_cost < dist.get(nxt, float("inf")):
+                dist[nxt] = new_cost
+                parent[nxt] = node
+                heapq.heappush(heap, (new_cost, nxt))
+    return dist, parent
+
+def _walk_back(parent, node):
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parent[node]
+    path.reverse()
+    return path
+
+# ==================================================
+# Pathfinding Service
+# ==================================================
+class Pathfinder:
+    """
+    Hierarchical pathfinding over the tile grid. Chunk graphs are built lazily
+    and dropped when invalidate() reports an edit near them; finished paths are
+    cached until an edit touches a chunk they cross. Mobs queue requests with
+    request() and update() plans as many as fit in its time budget each frame.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.chunks = {}
+        self.cache = OrderedDict()       # (start, goal) -> path or None
+        self.cache_chunks = {}           # chunk index -> set of cache keys crossing it
+        self.requests = deque()
+        self.pending = {}                # requester -> (start, goal, callback)
+
+    # ------------------------------
+    # Invalidation
+    # ------------------------------
+    def invalidate(self, x, y):
+        """
+        A block at (x, y) changed: drop the chunk graphs and cached paths that
+        may depend on it (its column and both neighbours).
+        """
+        for cx in {max(0, x - 1) // CHUNK_SIZE, x // CHUNK_SIZE, min(WORLD_WIDTH - 1, x + 1) // CHUNK_SIZE}:
+            self.chunks.pop(cx, None)
+            for key in self.cache_chunks.pop(cx, ()):
+                self.cache.pop(key, None)
+
+    def chunk(self, cx):
+        nav = self.chunks.get(cx)
+        if nav is None:
+            nav = self.chunks[cx] = ChunkNav(self.world, cx)
+        return nav
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def snap(self, x, y):
+        """
+        The standable cell at or below (x, y), or None if the column has none
+        within reach.
+        """
+        for ny in range(max(0, y), min(WORLD_HEIGHT, y + MAX_DROP + 2)):
+            if standable(self.world, x, ny):
+                return (x, ny)
+        return None
+
+    def find_path(self, start, goal):
+        """
+        Path of (x, y) cells from start to goal (both standable), or None.
+        """
+        key = (start, goal)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        path = self._plan(start, goal)
+        self.cache[key] = path
+        if path:
+            crossed = {node[0] // CHUNK_SIZE for node in path}
+        else:
+            # A failed search may succeed after any edit between the two ends.
+            low, high = sorted((start[0] // CHUNK_SIZE, goal[0] // CHUNK_SIZE))
+            crossed = range(low, high + 1)
+        for cx in crossed:
+            self.cache_chunks.setdefault(cx, set()).add(key)
+        while len(self.cache) > PATH_CACHE_SIZE:
+            old_key, _ = self.cache.popitem(last=False)
+            for keys in self.cache_chunks.values():
+                keys.discard(old_key)
+        return path
+
+    def request(self, requester, start, goal, callback):
+        """
+        Queue a path request; callback(path) runs from a later update(). A newer
+        request from the same requester replaces an older one still queued.
+        """
+        if requester not in self.pending:
+            self.requests.append(requester)
+        self.pending[requester] = (start, goal, callback)
+
+    def update(self, budget):
+        """
+        Serve queued requests until budget seconds have been spent (all of
+        them if budget is None).
+        """
+        deadline = time.perf_counter() + budget if budget is not None else None
+        while self.requests and (deadline is None or time.perf_counter() < deadline):
+            requester = self.requests.popleft()
+            start, goal, callback = self.pending.pop(requester)
+            callback(self.find_path(start, goal))
+
+    # ------------------------------
+    # Planning
+    # ------------------------------
+    def _plan(self, start, goal):
+        start_nav = self.chunk(start[0] // CHUNK_SIZE)
+        goal_nav = self.chunk(goal[0] // CHUNK_SIZE)
+        if not start_nav.contains(start) or not goal_nav.contains(goal):
+            return None
+        if start == goal:
+            return [start]
+        # Costs from the start to everything in its chunk, and from everything
+        # in the goal's chunk to the goal.
+        start_dist, start_parent = dijkstra(start_nav.edges, {start: 0})
+        goal_dist, goal_parent = dijkstra(goal_nav.reverse, {goal: 0})
+        if start_nav is goal_nav and goal in start_dist:
+            return _walk_back(start_parent, goal)
+
+        # High-level A* over chunk entrances. Every move shifts x by at most one
+        # and costs at least one, so |dx| is an admissible heuristic.
+        gx = goal[0]
+        best = {}
+        came_from = {}
+        heap = []
+        for entrance in start_nav.entrances:
+            if entrance in start_dist:
+                best[entrance] = start_dist[entrance]
+                came_from[entrance] = None
+                heapq.heappush(heap, (start_dist[entrance] + abs(entrance[0] - gx), start_dist[entrance], entrance))
+        finish, finish_cost = None, float("inf")
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if cost > best.get(node, float("inf")) or cost >= finish_cost:
+                continue
+            nav = self.chunk(node[0] // CHUNK_SIZE)
+            if nav is goal_nav and node in goal_dist and cost + goal_dist[node] < finish_cost:
+                finish, finish_cost = node, cost + goal_dist[node]
+            steps = []
+            dist, _ = nav.entrance_paths.get(node, ({}, None))
+            for other in nav.entrances:
+                if other != node and other in dist:
+                    steps.append((other, dist[other]))
+            steps.extend(nav.exits.get(node, ()))
+            for nxt, step in steps:
+                new_cost = cost + step
+                if new_cost < best.get(nxt, float("inf")):
+                    if not self.chunk(nxt[0] // CHUNK_SIZE).contains(nxt):
+                        continue
+                    best[nxt] = new_cost
+                    came_from[nxt] = node
+                    heapq.heappush(heap, (new_cost + abs(nxt[0] - gx), new_cost, nxt))
+        if finish is None:
+            return None
+        return self._refine(_walk_back(came_from, finish), start_parent, goal_parent, goal)
+
+    def _refine(self, waypoints, start_parent, goal_parent, goal):
+        """
+        Expand the entrance-level route into a cell-by-cell path.
+        """
+        path = _walk_back(start_parent, waypoints[0])
+        for previous, node in zip(waypoints, waypoints[1:]):
+            if previous[0] // CHUNK_SIZE == node[0] // CHUNK_SIZE:
+                _, parent = self.chunk(previous[0] // CHUNK_SIZE).entrance_paths[previous]
+                path.extend(_walk_back(parent, node)[1:])
+            else:
+                path.append(node)
+        # goal_parent points toward the goal (it was searched backwards).
+        node = goal_parent[waypoints[-1]]
+        while node is not None:
+            path.append(node)
+            node = goal_parent[node]
+        return path
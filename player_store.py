@@ -0,0 +1,138 @@
+# player_store.py
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = os.path.join("saves", "players.db")
+FLUSH_INTERVAL = 2.0      # seconds between write-behind flushes
+CACHE_SIZE = 10000        # player records kept in the read cache
+
+class PlayerStore:
+    """
+    Durable player state (position, health, inventory) in a local SQLite database.
+
+    Writes are write-behind: save() only records the latest state in memory and a
+    background thread writes every dirty player in one transaction per
+    FLUSH_INTERVAL, so gameplay never waits on the disk. Reads go through an LRU
+    cache, so a player who reconnects soon after leaving costs no query.
+    """
+    def __init__(self, path=DEFAULT_DB_PATH, flush_interval=FLUSH_INTERVAL, on_flush=None):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS players (
+                name TEXT PRIMARY KEY,
+                x REAL NOT NULL,
+                y REAL NOT NULL,
+                health INTEGER NOT NULL,
+                inventory TEXT NOT NULL
+            )""")
+        self.db.commit()
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush   # called with (seconds, records written) after each flush
+        self._cache = OrderedDict()
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def load(self, name):
+        """
+        Return a copy of the stored state for name, or None for a new player.
+        """
+        with self._lock:
+            record = self._cache.get(name)
+            if record is not None:
+                self._cache.move_to_end(name)
+                return _copy_state(record)
+        with self._db_lock:
+            row = self.db.execute("SELECT x, y, health, inventory FROM players WHERE name = ?",
+                                  (name,)).fetchone()
+        if row is None:
+            return None
+        inventory = {int(item): count for item, count in json.loads(row[3]).items()}
+        record = {"x": row[0], "y": row[1], "health": row[2], "inventory": inventory}
+        with self._lock:
+            self._remember(name, record)
+        return _copy_state(record)
+
+    def save(self, name, state):
+        """
+        Record the player's latest state; it reaches the disk on the next flush.
+        """
+        record = {"x": state["x"], "y": state["y"], "health": state["health"],
+                  "inventory": dict(state["inventory"])}
+        with self._lock:
+            self._remember(name, record)
+            self._dirty[name] = record
+
+    def update_position(self, name, x, y):
+        """
+        Cheap path for the frequent position-only updates from the simulation.
+        """
+        with self._lock:
+            record = self._cache.get(name)
+            if record is None:
+                return
+            record["x"], record["y"] = x, y
+            self._dirty[name] = record
+
+    def pending(self):
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self):
+        """
+        Write every dirty player in a single transaction.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            rows = [(name, r["x"], r["y"], r["health"], json.dumps(r["inventory"]))
+                    for name, r in dirty.items()]
+        started = time.perf_counter()
+        with self._db_lock:
+            with self.db:
+                self.db.executemany("""
+                    INSERT INTO players (name, x, y, health, inventory) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        x = excluded.x, y = excluded.y,
+                        health = excluded.health, inventory = excluded.inventory""", rows)
+        if self.on_flush is not None:
+            self.on_flush(time.perf_counter() - started, len(rows))
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self.db.close()
+
+    def _remember(self, name, record):
+        self._cache[name] = record
+        self._cache.move_to_end(name)
+        while len(self._cache) > CACHE_SIZE:
+            oldest = next(iter(self._cache))
+            if oldest in self._dirty:
+                # Never drop a record that has not been written yet.
+                self._cache.move_to_end(oldest)
+                break
+            del self._cache[oldest]
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+def _copy_state(record):
+    state = dict(record)
+    state["inventory"] = dict(record["inventory"])
+    return state
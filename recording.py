@@ -0,0 +1,149 @@
+# recording.py
+import gzip
+import json
+import hashlib
+import pygame
+
+RECORDING_VERSION = 1
+
+# Only events the game reacts to are kept; mouse motion is covered by the
+# per-frame mouse position.
+RECORDED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN,
+                   pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL)
+
+class FrameInput:
+    """
+    Everything the main loop reads from pygame in one frame.
+    keys supports keys[pygame.K_*] like pygame.key.get_pressed().
+    """
+    __slots__ = ("dt", "events", "mouse_pos", "keys", "mods")
+
+    def __init__(self, dt, events, mouse_pos, keys, mods):
+        self.dt = dt
+        self.events = events
+        self.mouse_pos = mouse_pos
+        self.keys = keys
+        self.mods = mods
+
+class PressedKeys(frozenset):
+    """
+    The recorded held keys, indexable like pygame.key.get_pressed().
+    """
+    def __getitem__(self, key):
+        return key in self
+
+class LiveInput:
+    """
+    Reads each frame's input from pygame, capped at fps, and hands it to an
+    optional Recorder.
+    """
+    def __init__(self, clock, fps, recorder=None):
+        self.clock = clock
+        self.fps = fps
+        self.recorder = recorder
+        # Recorded sessions avoid wall-clock dependent simulation so they replay exactly.
+        self.deterministic = recorder is not None
+
+    def next_frame(self):
+        ms = self.clock.tick(self.fps)
+        frame = FrameInput(ms / 1000.0, pygame.event.get(), pygame.mouse.get_pos(),
+                           pygame.key.get_pressed(), pygame.key.get_mods())
+        if self.recorder is not None:
+            self.recorder.add(ms, frame)
+        return frame
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+
+class Recorder:
+    """
+    Writes a session to a gzipped JSON-lines file: a header line (seed, screen
+    size and the held keys that are tracked), then one line per frame:
+    [dt_ms, mouse_x, mouse_y, mods, [held keys], [[event type, {attributes}], ...]].
+    """
+    def __init__(self, path, seed, resolution, keys):
+        self.keys = tuple(keys)
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"version": RECORDING_VERSION, "seed": seed,
+                     "resolution": list(resolution), "keys": list(self.keys)})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def add(self, ms, frame):
+        held = [key for key in self.keys if frame.keys[key]]
+        events = [[event.type, _event_attributes(event)] for event in frame.events
+                  if event.type in RECORDED_EVENTS]
+        self._write([ms, frame.mouse_pos[0], frame.mouse_pos[1], frame.mods, held, events])
+
+    def close(self):
+        self.file.close()
+
+def _event_attributes(event):
+    # Drop attributes that are not plain data (e.g. the window of an event).
+    return {name: value for name, value in event.dict.items()
+            if isinstance(value, (bool, int, float, str, tuple, list))}
+
+class Replay:
+    """
+    Plays a Recorder file back frame by frame, without waiting between frames.
+    next_frame() returns None once the recording has run out.
+    """
+    deterministic = True
+
+    def __init__(self, path):
+        self.file = gzip.open(path, "rt", encoding="utf-8")
+        header = json.loads(self.file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"unsupported recording version: {header.get('version')}")
+        self.seed = header["seed"]
+        self.resolution = tuple(header["resolution"])
+
+    def next_frame(self):
+        line = self.file.readline()
+        if not line:
+            return None
+        ms, mouse_x, mouse_y, mods, held, events = json.loads(line)
+        events = [pygame.event.Event(event_type, {name: tuple(value) if isinstance(value, list) else value
+                                                  for name, value in attributes.items()})
+                  for event_type, attributes in events]
+        return FrameInput(ms / 1000.0, events, (mouse_x, mouse_y), PressedKeys(held), mods)
+
+    def close(self):
+        self.file.close()
+
+def state_digest(world, player, inventory, entities):
+    """
+    Short hash of the game state at the end of a replay: the blocks, the player
+    (any tuple of its values), the inventory and every entity. Replaying one
+    recording twice must give the same digest.
+    """
+    digest = hashlib.sha256()
+    for column in world:
+        digest.update(bytes(column))
+    entity_state = [(entity.id, entity.kind, entity.x, entity.y, entity.vx, entity.vy, entity.health,
+                     entity.item, entity.count) for entity in sorted(entities, key=lambda entity: entity.id)]
+    digest.update(repr((player, sorted(inventory.items()), entity_state)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+class FrameStats:
+    """
+    Frame times grouped by game state, for comparing replays of one recording.
+    """
+    def __init__(self):
+        self.times = {}   # state -> [seconds]
+
+    def add(self, state, seconds):
+        self.times.setdefault(state, []).append(seconds)
+
+    def report(self):
+        lines = [f"{'state':<16}{'frames':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for state, times in self.times.items():
+            times = sorted(times)
+            def percentile(p):
+                return times[min(len(times) - 1, int(p * len(times)))] * 1000
+            mean = sum(times) / len(times) * 1000
+            lines.append(f"{state:<16}{len(times):>8}{mean:>9.2f}{percentile(0.5):>9.2f}"
+                         f"{percentile(0.95):>9.2f}{percentile(0.99):>9.2f}{times[-1] * 1000:>9.2f}")
+        return "\n".join(lines)
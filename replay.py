@@ -0,0 +1,57 @@
+# replay.py
+"""
+Replays a session recorded with python main.py --record <file> without a
+window or sound, as fast as the game can run, then prints frame times per
+game state. Run it on the same recording before and after a change to
+compare performance on an identical workload:
+
+    python replay.py session.rec
+
+With --check the recording is replayed twice and the final game states are
+compared; the exit status is 1 if they differ (the replay is not
+deterministic):
+
+    python replay.py --check session.rec
+"""
+import os
+import sys
+import subprocess
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+FINAL_STATE_PREFIX = "final state:"
+
+def run_replay(path):
+    """
+    Replay path in a fresh headless game process and return its output.
+    """
+    # Fixed hash seed so nothing depends on per-process string hashing.
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONHASHSEED="0")
+    result = subprocess.run([sys.executable, MAIN_PATH, "--replay", path], env=env,
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return result.stdout
+
+def final_state(output):
+    for line in output.splitlines():
+        if line.startswith(FINAL_STATE_PREFIX):
+            return line[len(FINAL_STATE_PREFIX):].strip()
+    return None
+
+def main(args):
+    check = "--check" in args
+    paths = [arg for arg in args if arg != "--check"]
+    if len(paths) != 1:
+        print("usage: python replay.py [--check] <recording>")
+        return 2
+    output = run_replay(paths[0])
+    print(output, end="")
+    if not check:
+        return 0
+    first, second = final_state(output), final_state(run_replay(paths[0]))
+    if first is None or first != second:
+        print(f"replays diverged: {first} != {second}")
+        return 1
+    print("replays match")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
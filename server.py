@@ -1,69 +1,349 @@
 # server.py
+import os
+import queue
 import socket
 import threading
-import random
+import logging
+import time
+import itertools
+import multiprocessing
+from collections import deque
 from world import generate_world, generate_structures
-from config import TILE_SIZE, WORLD_WIDTH, WORLD_HEIGHT, default_inventory
+from config import WORLD_WIDTH, WORLD_HEIGHT
+from metrics import MetricsRegistry, SampledLogger, start_metrics_server
+from player_store import PlayerStore
+from shard import SharedWorld, shard_bounds, shard_for_column, player_column, spawn_state, run_shard, queue_depth
 
 HOST = "0.0.0.0"
 PORT = 25515
 
-# Generate a permanent world for the server.
-world, terrain_heights = generate_world()
-generate_structures(world, terrain_heights)
+# Number of world shards (worker processes), each owning a range of columns.
+SHARDS = min(4, os.cpu_count() or 1)
 
-# Dictionary to hold connected players (using their connection as key).
+# Player snapshots sent to every client per second.
+SNAPSHOT_RATE = 20
+
+# Metrics endpoint (Prometheus text format) and logging settings.
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9105
+COMMAND_LOG_SAMPLE_RATE = 0.01   # fraction of received commands written to the debug log
+# Values of the "command" metric label; anything else a client sends is counted as "other".
+COMMAND_TYPES = frozenset(("input", "break", "place", "health", "login", "die"))
+
+# Messages queued for one client before it is disconnected as too slow to keep up.
+MAX_OUTGOING_MESSAGES = 4096
+
+log = logging.getLogger("server")
+command_log = SampledLogger(log, COMMAND_LOG_SAMPLE_RATE)
+
+metrics = MetricsRegistry()
+connections_total = metrics.counter("server_connections_total", "Client connections accepted.")
+players_online = metrics.gauge("server_players_online", "Currently connected clients.")
+commands_total = metrics.counter("server_commands_total", "Commands received, by command type.", ["command"])
+bytes_in_total = metrics.counter("server_bytes_received_total", "Bytes received from clients.")
+bytes_out_total = metrics.counter("server_bytes_sent_total", "Bytes sent to clients.")
+client_errors_total = metrics.counter("server_client_errors_total", "Client connections closed by an error.")
+command_latency = metrics.histogram("server_command_latency_seconds",
+                                    "Time from receiving a command to finishing the reply.", ["command"])
+handoffs_total = metrics.counter("server_shard_handoffs_total", "Players handed off between shards.")
+shard_queue_depth = metrics.gauge("server_shard_queue_depth", "Messages waiting in each shard's inbox.", ["shard"])
+shard_players = metrics.gauge("server_shard_players", "Players owned by each shard.", ["shard"])
+tick_duration = metrics.histogram("server_tick_seconds", "Time spent simulating one shard tick.", ["shard"])
+store_dirty_players = metrics.gauge("server_store_dirty_players", "Player records waiting for the next write-behind flush.")
+store_flush_duration = metrics.histogram("server_store_flush_seconds", "Time spent writing one batch of player records.")
+store_flushed_total = metrics.counter("server_store_records_written_total", "Player records written to the database.")
+snapshot_duration = metrics.histogram("server_snapshot_seconds", "Time spent building and sending one round of snapshots.")
+
+# Shared world and shard workers (set up by start_server).
+shared_world = None
+bounds = []
+shard_inboxes = []
+shard_outbox = None
+
+# Persistent player state (set up by start_server).
+store = None
+
+# Connected players by player id: {"conn", "addr", "name", "shard", "pending", "outgoing", "snapshot"}.
 players = {}
+# Clients that have been sent the world but have not joined a shard yet (no first
+# command so far); they still receive block edits so their copy stays current.
+connecting = {}
+# Names of disconnected players whose final state is still on its way back from a shard.
+departed = {}
+players_lock = threading.Lock()
+next_player_id = itertools.count(1)
+
+def send_reply(player, text):
+    """
+    Queue text for the player's writer thread; never blocks on the socket.
+    A client that stops reading is disconnected once its queue is full.
+    """
+    try:
+        player["outgoing"].put_nowait(text)
+    except queue.Full:
+        close_quietly(player["conn"])
+
+def client_writer(player):
+    """
+    Per-client thread that owns every write to the client's socket, so a slow
+    client only ever holds up its own messages.
+    """
+    conn, outgoing = player["conn"], player["outgoing"]
+    while True:
+        text = outgoing.get()
+        if text is None:
+            break
+        payload = (text + "\n").encode("utf-8")
+        try:
+            conn.sendall(payload)
+        except OSError:
+            break
+        bytes_out_total.inc(len(payload))
+
+def close_quietly(conn):
+    # Shutting down wakes the client's reader thread, which then cleans up.
+    try:
+        conn.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+def world_message():
+    """
+    Full world sent to a client on connect: "world <width> <height> <blocks> <heights>"
+    with blocks flattened column by column, as in the save files.
+    """
+    blocks = ",".join(map(str, shared_world.blocks))
+    heights = ",".join(map(str, shared_world.heights))
+    return f"world {WORLD_WIDTH} {WORLD_HEIGHT} {blocks} {heights}"
+
+def assign_shard(pid, player, state):
+    """
+    Give a player (and its state) to the shard that owns its current column.
+    """
+    shard_id = shard_for_column(player_column(state), bounds)
+    player["shard"] = shard_id
+    shard_inboxes[shard_id].put(("join", pid, state))
+
+def join_player(pid, player, name, state):
+    """
+    Hand a player to a shard with its saved state (from store.load, which the
+    caller runs before taking players_lock), or a new one if state is None.
+    Called with players_lock held.
+    """
+    if state is None:
+        state = spawn_state(shared_world)
+    else:
+        state["vel_y"] = 0
+        state["on_ground"] = False
+    player["name"] = name
+    connecting.pop(pid, None)
+    players[pid] = player
+    assign_shard(pid, player, state)
+    inventory = ",".join(f"{item}:{count}" for item, count in state["inventory"].items())
+    send_reply(player, f"you {state['x']:.2f} {state['y']:.2f} {state['health']} {inventory}")
+
+def record_flush(seconds, count):
+    store_flush_duration.observe(seconds)
+    store_flushed_total.inc(count)
+
+def dispatch_shard_messages():
+    """
+    Front-end thread: forwards shard replies to sockets and performs handoffs.
+    """
+    while True:
+        message = shard_outbox.get()
+        kind, pid = message[0], message[1]
+        if kind == "tick":
+            tick_duration.observe(message[2], shard=pid)
+            continue
+        # Messages to send once players_lock is released: [(player, text)].
+        outgoing = []
+        with players_lock:
+            player = players.get(pid)
+            if player is None:
+                # A disconnected player's final state ("left", or a handoff that was in flight).
+                if kind in ("left", "handoff") and message[2] is not None:
+                    name = departed.pop(pid, None)
+                    if name:
+                        store.save(name, message[2])
+                continue
+            if kind == "state":
+                player["snapshot"] = message[2:]
+                if player["name"]:
+                    store.update_position(player["name"], message[2], message[3])
+            elif kind == "save":
+                if player["name"]:
+                    store.save(player["name"], message[2])
+            elif kind == "reply":
+                outgoing.append((player, message[2]))
+                if player["pending"]:
+                    received_at, command_type = player["pending"].popleft()
+                    command_latency.observe(time.perf_counter() - received_at, command=command_type)
+                if message[2].startswith("set "):
+                    # Block edits are visible to everyone, including clients still joining.
+                    outgoing.extend((other, message[2]) for other_pid, other in players.items() if other_pid != pid)
+                    outgoing.extend((other, message[2]) for other in connecting.values())
+            elif kind == "handoff":
+                handoffs_total.inc()
+                assign_shard(pid, player, message[2])
+            elif kind == "reroute":
+                shard_inboxes[player["shard"]].put(("cmd", pid, message[2]))
+        for target, text in outgoing:
+            send_reply(target, text)
+
+def broadcast_snapshots():
+    """
+    Send every client its authoritative state (with the last input sequence the
+    server applied) followed by the positions of all other players:
+    "snap <time> <seq> <x> <y> <vel_y> <on_ground> <pid>,<x>,<y> ..."
+    """
+    interval = 1.0 / SNAPSHOT_RATE
+    while True:
+        time.sleep(interval)
+        started = time.perf_counter()
+        with players_lock:
+            targets = [(pid, player, player["snapshot"]) for pid, player in players.items()]
+        positions = {pid: f"{pid},{snap[0]:.2f},{snap[1]:.2f}" for pid, player, snap in targets if snap}
+        now = time.time()
+        for pid, player, snap in targets:
+            if snap is None:
+                continue
+            x, y, vel_y, on_ground, seq = snap
+            others = " ".join(text for other_pid, text in positions.items() if other_pid != pid)
+            send_reply(player, f"snap {now:.3f} {seq} {x:.2f} {y:.2f} {vel_y:.2f} {int(on_ground)} {others}".rstrip())
+        snapshot_duration.observe(time.perf_counter() - started)
+
+def update_shard_gauges():
+    while True:
+        counts = [0] * len(bounds)
+        with players_lock:
+            for player in players.values():
+                counts[player["shard"]] += 1
+        for shard_id, inbox in enumerate(shard_inboxes):
+            shard_queue_depth.set(queue_depth(inbox), shard=shard_id)
+            shard_players.set(counts[shard_id], shard=shard_id)
+        store_dirty_players.set(store.pending())
+        time.sleep(1)
 
 def handle_client(conn, addr):
-    print(f"Client connected: {addr}")
-    # Assign spawn position (center of the world)
-    spawn_x = (WORLD_WIDTH // 2) * TILE_SIZE
-    surface_y = terrain_heights[WORLD_WIDTH // 2]
-    spawn_y = (surface_y - 1) * TILE_SIZE
-    player_state = {
-        "x": spawn_x,
-        "y": spawn_y,
-        "inventory": default_inventory.copy(),
-        "health": 10
-    }
-    players[conn] = player_state
+    log.info("Client connected: %s", addr)
+    connections_total.inc()
+    players_online.inc()
+    pid = next(next_player_id)
+    player = {"conn": conn, "addr": addr, "name": None, "shard": 0, "pending": deque(),
+              "outgoing": queue.Queue(MAX_OUTGOING_MESSAGES), "snapshot": None}
+    writer = threading.Thread(target=client_writer, args=(player,), daemon=True)
+    writer.start()
+    buffer = b""
+    joined = False
     try:
+        with players_lock:
+            # Queued under the lock, so every edit broadcast after this snapshot
+            # is queued behind it, and every earlier one is already in it.
+            send_reply(player, world_message())
+            connecting[pid] = player
         while True:
             data = conn.recv(1024)
             if not data:
                 break
-            command = data.decode("utf-8")
-            print(f"Received from {addr}: {command}")
-            if command == "die":
-                # Reset the player's state.
-                player_state["inventory"] = default_inventory.copy()
-                player_state["health"] = 10
-                player_state["x"] = spawn_x
-                player_state["y"] = spawn_y
-                conn.sendall("reset".encode("utf-8"))
-            else:
-                conn.sendall("ack".encode("utf-8"))
+            received_at = time.perf_counter()
+            bytes_in_total.inc(len(data))
+            buffer += data
+            # Commands are newline-terminated.
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                command = line.decode("utf-8").strip()
+                command_type = command.split(" ", 1)[0]
+                command_label = command_type if command_type in COMMAND_TYPES else "other"
+                commands_total.inc(command=command_label)
+                command_log.debug("Received from %s: %s", addr, command)
+                if not joined:
+                    # The first line may be "login <name>"; anonymous players are not saved.
+                    name = command[len("login "):].strip()[:32] if command_type == "login" else ""
+                    # Read from the database before locking, so logins never stall other clients.
+                    saved = store.load(name) if name else None
+                    with players_lock:
+                        join_player(pid, player, name or None, saved)
+                    joined = True
+                    if command_type == "login":
+                        continue
+                with players_lock:
+                    if command_type != "input":
+                        # Inputs are answered by snapshots rather than a reply.
+                        player["pending"].append((received_at, command_label))
+                    shard_inboxes[player["shard"]].put(("cmd", pid, command))
     except Exception as e:
-        print(f"Error with client {addr}: {e}")
+        client_errors_total.inc()
+        log.warning("Error with client %s: %s", addr, e)
     finally:
+        # A writer blocked in sendall fails once the socket is shut down; an idle
+        # one (with room in its queue) stops at the None.
+        close_quietly(conn)
+        try:
+            player["outgoing"].put_nowait(None)
+        except queue.Full:
+            pass
+        writer.join(timeout=1)
         conn.close()
-        del players[conn]
-        print(f"Client disconnected: {addr}")
+        with players_lock:
+            connecting.pop(pid, None)
+            if pid in players:
+                shard_inboxes[player["shard"]].put(("leave", pid))
+                del players[pid]
+                if player["name"]:
+                    departed[pid] = player["name"]
+        players_online.dec()
+        log.info("Client disconnected: %s", addr)
+
+def start_shards(num_shards):
+    global shared_world, bounds, shard_inboxes, shard_outbox
+    # Generate a permanent world for the server and share it with the shards.
+    world, terrain_heights = generate_world()
+    generate_structures(world, terrain_heights)
+    shared_world = SharedWorld()
+    shared_world.load(world, terrain_heights)
+    bounds = shard_bounds(num_shards)
+    shard_outbox = multiprocessing.Queue()
+    shard_inboxes = []
+    processes = []
+    for shard_id in range(len(bounds)):
+        inbox = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_shard, name=f"shard-{shard_id}",
+                                          args=(shard_id, bounds, shared_world, inbox, shard_outbox),
+                                          daemon=True)
+        process.start()
+        shard_inboxes.append(inbox)
+        processes.append(process)
+        log.info("Shard %d owns columns %d-%d", shard_id, bounds[shard_id][0], bounds[shard_id][1] - 1)
+    threading.Thread(target=dispatch_shard_messages, daemon=True).start()
+    threading.Thread(target=broadcast_snapshots, daemon=True).start()
+    threading.Thread(target=update_shard_gauges, daemon=True).start()
+    return processes
 
 def start_server():
+    global store
+    store = PlayerStore(on_flush=record_flush)
+    processes = start_shards(SHARDS)
+    start_metrics_server(metrics, METRICS_HOST, METRICS_PORT)
+    log.info("Metrics available at http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.bind((HOST, PORT))
     s.listen()
-    print(f"Server listening on {HOST}:{PORT}")
+    log.info("Server listening on %s:%d", HOST, PORT)
     try:
         while True:
             conn, addr = s.accept()
             threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
     except KeyboardInterrupt:
-        print("Server shutting down.")
+        log.info("Server shutting down.")
     finally:
         s.close()
+        for inbox in shard_inboxes:
+            inbox.put(("stop",))
+        for process in processes:
+            process.join(timeout=1)
+        store.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     start_server()
@@ -0,0 +1,279 @@
+# shard.py
+import time
+import queue
+from collections import deque
+from multiprocessing import RawArray, Lock
+from config import TILE_SIZE, WORLD_WIDTH, WORLD_HEIGHT, AIR, MAX_HEALTH, default_inventory, SOLID, PLACEABLE
+from collision import step_player
+from world import update_surface, spawn_position
+
+# Server simulation rate (ticks per second) and the longest input step accepted.
+TICK_RATE = 20
+MAX_INPUT_DT = 0.1
+# Input time a player may have banked ahead of real time (covers network jitter).
+MAX_INPUT_BACKLOG = 0.5
+PLAYER_WIDTH = TILE_SIZE // 2
+PLAYER_HEIGHT = TILE_SIZE
+# Farthest block (center to center, in pixels) a player may break or place: the
+# client's 5 blocks, plus one for the server's position lagging the prediction.
+EDIT_REACH = 6 * TILE_SIZE
+
+# ==================================================
+# Shared World Storage
+# ==================================================
+class SharedWorld:
+    """
+    World blocks and terrain heights kept in shared memory so every shard process
+    can read any column (including its neighbours' border columns) without
+    message passing. Blocks are stored column-major: index = x * WORLD_HEIGHT + y.
+    Each shard only writes blocks on behalf of the players it owns; a player may
+    edit blocks in a neighbour's columns, so edits that read a block before
+    writing it hold lock across both.
+    """
+    def __init__(self):
+        self.blocks = RawArray("B", WORLD_WIDTH * WORLD_HEIGHT)
+        self.heights = RawArray("H", WORLD_WIDTH)
+        self.lock = Lock()
+        self._view = None
+
+    def __getstate__(self):
+        # Memoryviews cannot be pickled; each process creates its own.
+        state = self.__dict__.copy()
+        state["_view"] = None
+        return state
+
+    def __getitem__(self, x):
+        """
+        Zero-copy column view so the shared world can be indexed as world[x][y],
+        like the list-of-columns world used by the collision functions.
+        """
+        if self._view is None:
+            self._view = memoryview(self.blocks).cast("B")
+        base = x * WORLD_HEIGHT
+        return self._view[base:base + WORLD_HEIGHT]
+
+    def load(self, world, terrain_heights):
+        for x in range(WORLD_WIDTH):
+            base = x * WORLD_HEIGHT
+            self.blocks[base:base + WORLD_HEIGHT] = world[x]
+        self.heights[:] = terrain_heights[:WORLD_WIDTH]
+
+    def get(self, x, y):
+        return self.blocks[x * WORLD_HEIGHT + y]
+
+    def set(self, x, y, block):
+        self.blocks[x * WORLD_HEIGHT + y] = block
+        update_surface(self.heights, self, x, y, block)
+
+    def surface(self, x):
+        return self.heights[x]
+
+# ==================================================
+# Column Ranges
+# ==================================================
+def shard_bounds(num_shards):
+    """
+    Split the world into num_shards contiguous column ranges [x_start, x_end).
+    """
+    num_shards = max(1, min(num_shards, WORLD_WIDTH))
+    bounds = []
+    for i in range(num_shards):
+        bounds.append((i * WORLD_WIDTH // num_shards, (i + 1) * WORLD_WIDTH // num_shards))
+    return bounds
+
+def shard_for_column(x, bounds):
+    x = max(0, min(WORLD_WIDTH - 1, x))
+    for shard_id, (x_start, x_end) in enumerate(bounds):
+        if x_start <= x < x_end:
+            return shard_id
+    return len(bounds) - 1
+
+def player_column(state):
+    return int(state["x"] // TILE_SIZE)
+
+def in_reach(state, bx, by):
+    dx = state["x"] + PLAYER_WIDTH / 2 - (bx + 0.5) * TILE_SIZE
+    dy = state["y"] + PLAYER_HEIGHT / 2 - (by + 0.5) * TILE_SIZE
+    return dx * dx + dy * dy <= EDIT_REACH * EDIT_REACH
+
+def spawn_state(shared_world):
+    spawn_x, spawn_y = spawn_position(shared_world.heights)
+    return {
+        "x": spawn_x,
+        "y": spawn_y,
+        "vel_y": 0,
+        "on_ground": False,
+        "inventory": default_inventory.copy(),
+        "health": MAX_HEALTH
+    }
+
+# ==================================================
+# Shard Worker
+# ==================================================
+def handle_command(command, state, shared_world):
+    """
+    Apply one client command to a player's state. Returns the reply text.
+    """
+    parts = command.split()
+    if not parts:
+        return "ack"
+    name = parts[0]
+    try:
+        if name == "die":
+            # Reset the player's state.
+            state.update(spawn_state(shared_world))
+            return "reset"
+        elif name == "health":
+            # Damage and regeneration are simulated by the client; kept for saving.
+            state["health"] = max(0, min(int(parts[1]), MAX_HEALTH))
+            return "ack"
+        elif name == "break":
+            bx, by = int(parts[1]), int(parts[2])
+            if 0 <= bx < WORLD_WIDTH and 0 <= by < WORLD_HEIGHT:
+                with shared_world.lock:
+                    block = shared_world.get(bx, by)
+                    if not SOLID[block] or not in_reach(state, bx, by):
+                        return f"deny {bx} {by} {block}"
+                    shared_world.set(bx, by, AIR)
+                state["inventory"][block] = state["inventory"].get(block, 0) + 1
+                return f"set {bx} {by} {AIR}"
+            return "deny"
+        elif name == "place":
+            bx, by, block = int(parts[1]), int(parts[2]), int(parts[3])
+            if 0 <= bx < WORLD_WIDTH and 0 <= by < WORLD_HEIGHT and 0 <= block < len(PLACEABLE) and PLACEABLE[block]:
+                with shared_world.lock:
+                    current = shared_world.get(bx, by)
+                    if state["inventory"].get(block, 0) <= 0 or current != AIR or not in_reach(state, bx, by):
+                        return f"deny {bx} {by} {current}"
+                    shared_world.set(bx, by, block)
+                state["inventory"][block] -= 1
+                return f"set {bx} {by} {block}"
+            return "deny"
+    except (IndexError, ValueError):
+        return "error"
+    return "ack"
+
+def parse_input(command):
+    """
+    Parse "input <seq> <direction> <jump> <dt>" into (seq, direction, jump, dt).
+    """
+    _, seq, direction, jump, dt = command.split()
+    direction = max(-1, min(1, int(direction)))
+    dt = max(0.0, min(float(dt), MAX_INPUT_DT))
+    return int(seq), direction, jump == "1", dt
+
+def limit_input_time(state, dt):
+    """
+    Shorten an input step so the total time simulated for a player never runs
+    ahead of the real time since it joined (plus MAX_INPUT_BACKLOG); otherwise a
+    client could move faster by sending long steps more often. The clock is
+    kept in the player's state, so it survives handoffs.
+    """
+    now = time.monotonic()
+    budget = state.get("input_budget", MAX_INPUT_DT) + now - state.get("input_clock", now)
+    budget = min(budget, MAX_INPUT_BACKLOG)
+    dt = min(dt, budget)
+    state["input_budget"] = budget - dt
+    state["input_clock"] = now
+    return dt
+
+def simulate_inputs(state, pending, shared_world):
+    """
+    Apply every queued input to the player in order. Returns the last sequence
+    number applied, which the client uses to reconcile its prediction.
+    """
+    seq = None
+    x, y = state["x"], state["y"]
+    vel_y, on_ground = state["vel_y"], state["on_ground"]
+    while pending:
+        seq, direction, jump, dt = pending.popleft()
+        x, y, vel_y, on_ground, landed = step_player(x, y, vel_y, on_ground, direction, jump, dt,
+                                                     PLAYER_WIDTH, PLAYER_HEIGHT, shared_world)
+    state["x"], state["y"] = x, y
+    state["vel_y"], state["on_ground"] = vel_y, on_ground
+    return seq
+
+def run_shard(shard_id, bounds, shared_world, inbox, outbox):
+    """
+    Worker process entry point. Owns the players whose column falls inside
+    bounds[shard_id] and hands them back to the front-end (as "handoff") as soon
+    as they move outside it. Player inputs are queued as they arrive and
+    simulated together once per tick.
+
+    Messages in:  ("join", pid, state), ("leave", pid), ("cmd", pid, text), ("stop",)
+    Messages out: ("reply", pid, text), ("handoff", pid, state), ("left", pid, state),
+                  ("reroute", pid, text), ("save", pid, state),
+                  ("state", pid, x, y, vel_y, on_ground, seq),
+                  ("tick", shard_id, seconds)
+    """
+    players = {}
+    inputs = {}
+    tick_interval = 1.0 / TICK_RATE
+    next_tick = time.perf_counter() + tick_interval
+    while True:
+        try:
+            message = inbox.get(timeout=max(0.0, next_tick - time.perf_counter()))
+        except queue.Empty:
+            message = None
+        except (KeyboardInterrupt, EOFError):
+            break
+        if message is not None:
+            kind = message[0]
+            if kind == "stop":
+                break
+            elif kind == "join":
+                players[message[1]] = message[2]
+                inputs[message[1]] = deque()
+            elif kind == "leave":
+                inputs.pop(message[1], None)
+                outbox.put(("left", message[1], players.pop(message[1], None)))
+            elif kind == "cmd":
+                pid, command = message[1], message[2]
+                state = players.get(pid)
+                if state is None:
+                    # The player was handed off after the front-end queued this command.
+                    outbox.put(("reroute", pid, command))
+                elif command.split(" ", 1)[0] == "input":
+                    # Classified exactly like the front-end does, which expects no reply.
+                    try:
+                        seq, direction, jump, dt = parse_input(command)
+                    except ValueError:
+                        pass
+                    else:
+                        inputs[pid].append((seq, direction, jump, limit_input_time(state, dt)))
+                else:
+                    if inputs[pid]:
+                        # Keep commands ordered with the inputs sent before them.
+                        seq = simulate_inputs(state, inputs[pid], shared_world)
+                        outbox.put(("state", pid, state["x"], state["y"], state["vel_y"], state["on_ground"], seq))
+                    outbox.put(("reply", pid, handle_command(command, state, shared_world)))
+                    outbox.put(("save", pid, state))
+                    if shard_for_column(player_column(state), bounds) != shard_id:
+                        inputs.pop(pid)
+                        outbox.put(("handoff", pid, players.pop(pid)))
+        if time.perf_counter() < next_tick:
+            continue
+        # Simulation tick.
+        tick_start = time.perf_counter()
+        for pid in list(players):
+            pending = inputs[pid]
+            if not pending:
+                continue
+            state = players[pid]
+            seq = simulate_inputs(state, pending, shared_world)
+            outbox.put(("state", pid, state["x"], state["y"], state["vel_y"], state["on_ground"], seq))
+            if shard_for_column(player_column(state), bounds) != shard_id:
+                del inputs[pid]
+                outbox.put(("handoff", pid, players.pop(pid)))
+        outbox.put(("tick", shard_id, time.perf_counter() - tick_start))
+        next_tick += tick_interval
+        if next_tick < tick_start:
+            # Fell behind (e.g. the machine was suspended); don't try to catch up.
+            next_tick = tick_start + tick_interval
+
+def queue_depth(q):
+    try:
+        return q.qsize()
+    except NotImplementedError:
+        # Not available on every platform (e.g. macOS).
+        return 0
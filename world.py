@@ -2,20 +2,27 @@
 import random
 from config import *
 
-def generate_world(seed=None):
+# Bump whenever generation changes what a seed produces (cached worlds are keyed by it).
+GENERATOR_VERSION = 1
+
+def generate_world(seed=None, rng=None, progress=None):
     """
     Generate a new world using an optional seed.
     Returns a 2D world array and a terrain height list.
+    rng is the random.Random to draw from; without one the global generator is
+    reseeded and used. progress(fraction) is called as columns are finished.
     """
-    if seed is not None and seed != "":
-        random.seed(seed)
-    else:
-        random.seed()
+    if rng is None:
+        rng = random
+        if seed is not None and seed != "":
+            random.seed(seed)
+        else:
+            random.seed()
     world = [[AIR for _ in range(WORLD_HEIGHT)] for _ in range(WORLD_WIDTH)]
     terrain_heights = []
     height = WORLD_HEIGHT // 2
     for x in range(WORLD_WIDTH):
-        height += random.choice([-1, 0, 1])
+        height += rng.choice([-1, 0, 1])
         height = max(WORLD_HEIGHT // 4, min(WORLD_HEIGHT - 10, height))
         terrain_heights.append(height)
         for y in range(WORLD_HEIGHT):
@@ -26,10 +33,10 @@ def generate_world(seed=None):
             elif y <= height + 3:
                 world[x][y] = DIRT
             else:
-                if random.random() < 0.05:
+                if rng.random() < 0.05:
                     world[x][y] = AIR  # cave
                 else:
-                    chance = random.random()
+                    chance = rng.random()
                     if chance < 0.01:
                         world[x][y] = COAL
                     elif chance < 0.015:
@@ -40,19 +47,84 @@ def generate_world(seed=None):
                         world[x][y] = DIAMOND
                     else:
                         world[x][y] = STONE
+        if progress is not None:
+            progress((x + 1) / WORLD_WIDTH)
     return world, terrain_heights
 
-def generate_trees(world, terrain_heights):
+# ==================================================
+# Surface Height Index
+# ==================================================
+def find_surface(world, x, start_y=0):
+    """
+    Scan column x downward from start_y for the first solid block.
+    Returns WORLD_HEIGHT if there is none.
+    """
+    column = world[x]
+    y = start_y
+    while y < WORLD_HEIGHT and not SOLID[column[y]]:
+        y += 1
+    return y
+
+def update_surface(heights, world, x, y, block):
+    """
+    Fix heights[x] after world[x][y] was set to block. Placing costs O(1); only
+    removing the top block scans down to the next solid one.
+    """
+    if SOLID[block]:
+        if y < heights[x]:
+            heights[x] = y
+    elif y == heights[x]:
+        heights[x] = find_surface(world, x, y + 1)
+
+def spawn_position(heights, x=WORLD_WIDTH // 2):
+    """
+    Pixel position of a player standing on top of column x.
+    """
+    return x * TILE_SIZE, (heights[x] - 1) * TILE_SIZE
+
+class SurfaceIndex:
+    """
+    The y of the highest solid block in every column, kept correct as blocks
+    change so spawn, tree placement and mob spawning can look up the surface
+    in O(1) instead of rescanning columns. heights is the same list the rest
+    of the game knows as terrain_heights.
+    """
+    def __init__(self, world, heights=None):
+        self.world = world
+        if heights is None:
+            heights = [find_surface(world, x) for x in range(WORLD_WIDTH)]
+        self.heights = heights
+
+    def surface_y(self, x):
+        return self.heights[x]
+
+    def spawn_position(self, x=WORLD_WIDTH // 2):
+        return spawn_position(self.heights, x)
+
+    def set_block(self, x, y, block):
+        """
+        Write a block and update the index (used by generation).
+        """
+        self.world[x][y] = block
+        update_surface(self.heights, self.world, x, y, block)
+
+    def on_block_changed(self, x, y, old_block, new_block):
+        update_surface(self.heights, self.world, x, y, new_block)
+
+# ==================================================
+# Structures
+# ==================================================
+def generate_trees(world, surface, rng=random):
     """
     Generate trees on grass: a trunk (WOOD) and a simple 3x3 canopy of LEAVES.
     """
     for x in range(1, WORLD_WIDTH - 1):
-        surface_y = terrain_heights[x]
-        if world[x][surface_y] == GRASS and random.random() < TREE_CHANCE:
-            trunk_height = random.randint(3, 5)
+        surface_y = surface.surface_y(x)
+        if world[x][surface_y] == GRASS and rng.random() < TREE_CHANCE:
+            trunk_height = rng.randint(3, 5)
             for i in range(1, trunk_height + 1):
                 if surface_y - i >= 0:
-                    world[x][surface_y - i] = WOOD
+                    surface.set_block(x, surface_y - i, WOOD)
             canopy_y = surface_y - trunk_height
             for dx in [-1, 0, 1]:
                 for dy in [-1, 0, 1]:
@@ -60,12 +132,46 @@ def generate_trees(world, terrain_heights):
                     ty = canopy_y + dy
                     if 0 <= tx < WORLD_WIDTH and 0 <= ty < WORLD_HEIGHT:
                         if world[tx][ty] == AIR:
-                            world[tx][ty] = LEAVES
+                            surface.set_block(tx, ty, LEAVES)
+
+def generate_ponds(world, surface):
+    """
+    Fill one-column dips in the terrain with WATER on a bed of SAND, with sand
+    banks on either side. Runs before trees so tree tops are not mistaken for
+    terrain.
+    """
+    heights = surface.heights
+    for x in range(1, WORLD_WIDTH - 1):
+        surface_y = heights[x]
+        if heights[x - 1] < surface_y and heights[x + 1] < surface_y:
+            if world[x][surface_y] != GRASS:
+                continue
+            if surface_y + 1 < WORLD_HEIGHT:
+                surface.set_block(x, surface_y + 1, SAND)
+            surface.set_block(x, surface_y, WATER)
+            for bank_x in (x - 1, x + 1):
+                if world[bank_x][heights[bank_x]] == GRASS:
+                    surface.set_block(bank_x, heights[bank_x], SAND)
+
+def generate_structures(world, terrain_heights, rng=random):
+    """
+    Generate additional structures: ponds, then trees. terrain_heights is
+    updated in place to stay the surface height of every column.
+    """
+    surface = SurfaceIndex(world, terrain_heights)
+    generate_ponds(world, surface)
+    generate_trees(world, surface, rng)
 
-def generate_structures(world, terrain_heights):
+def create_world(seed=None, progress=None):
     """
-    Generate additional structures. For now, we generate trees.
+    Generate terrain and structures for seed (random if empty) with a private
+    random.Random, so it gives the same world as generate_world +
+    generate_structures but is safe to run off the main thread.
+    progress(fraction) reports how far along generation is.
     """
-    generate_trees(world, terrain_heights)
+    rng = random.Random(seed) if seed is not None and seed != "" else random.Random()
+    world, terrain_heights = generate_world(seed, rng, progress)
+    generate_structures(world, terrain_heights, rng)
+    return world, terrain_heights
 
 # World save/load helper functions are implemented in main.py.
@@ -0,0 +1,128 @@
+# world_cache.py
+import os
+import mmap
+import hashlib
+import threading
+from array import array
+from config import WORLD_WIDTH, WORLD_HEIGHT
+from world import GENERATOR_VERSION, create_world
+
+DEFAULT_CACHE_DIR = os.path.join("saves", "world_cache")
+CACHE_MAX_BYTES = 64 * 1024 * 1024   # oldest worlds are evicted above this
+
+MAGIC = b"2DCW"
+
+def cache_key(seed, width=WORLD_WIDTH, height=WORLD_HEIGHT, version=GENERATOR_VERSION):
+    """
+    Content address of a generated world: everything its blocks depend on.
+    """
+    return hashlib.sha256(f"{version}:{width}x{height}:{seed}".encode("utf-8")).hexdigest()
+
+class WorldCache:
+    """
+    Generated worlds stored on disk by cache_key(seed), so generating a seed
+    that was generated before is a memory-mapped read instead of a rerun of the
+    generator. Only seeded worlds are cached; random ones never repeat.
+
+    File layout: MAGIC, then the blocks column by column (one byte each, the
+    same x * WORLD_HEIGHT + y order as the shards' shared memory), then the
+    terrain heights as unsigned shorts. Files are written to a temporary name
+    and renamed, so a crash never leaves a half-written world behind.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, seed):
+        return os.path.join(self.directory, cache_key(seed) + ".world")
+
+    def load(self, seed):
+        """
+        (world, terrain_heights) for seed, or None if it is not cached.
+        """
+        path = self._path(seed)
+        size = len(MAGIC) + WORLD_WIDTH * WORLD_HEIGHT + 2 * WORLD_WIDTH
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != size:
+                    raise ValueError("truncated world cache file")
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if data[:len(MAGIC)] != MAGIC:
+                        raise ValueError("not a world cache file")
+                    start = len(MAGIC)
+                    world = [list(data[start + x * WORLD_HEIGHT:start + (x + 1) * WORLD_HEIGHT])
+                             for x in range(WORLD_WIDTH)]
+                    heights = array("H")
+                    heights.frombytes(data[start + WORLD_WIDTH * WORLD_HEIGHT:])
+            # Mark as recently used for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Unreadable entry: drop it and regenerate.
+            self._discard(path)
+            return None
+        return world, heights.tolist()
+
+    def store(self, seed, world, terrain_heights):
+        path = self._path(seed)
+        # Unique per writer, in case two jobs generate the same seed at once.
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(MAGIC)
+                for column in world:
+                    f.write(bytes(column))
+                f.write(array("H", terrain_heights).tobytes())
+            os.replace(temp_path, path)
+        except OSError:
+            # The cache is an optimization; a full or read-only disk is not an error.
+            self._discard(temp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used worlds until the cache fits in max_bytes.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".world")]
+        except OSError:
+            return
+        stats = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Evicted or replaced by another process since scandir().
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+        stats.sort()
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def generate(self, seed=None, progress=None):
+        """
+        Same as world.create_world, but served from the cache when possible.
+        """
+        if seed is None or seed == "":
+            return create_world(seed, progress)
+        cached = self.load(seed)
+        if cached is not None:
+            if progress is not None:
+                progress(1.0)
+            return cached
+        world, terrain_heights = create_world(seed, progress)
+        self.store(seed, world, terrain_heights)
+        return world, terrain_heights
@@ -0,0 +1,87 @@
+# world_loader.py
+import threading
+from collections import deque
+from config import WORLD_POOL_SIZE
+from world import create_world
+
+class WorldJob:
+    """
+    Generates one world on a background thread. The main loop polls done and
+    progress every frame (to draw a loading screen) instead of blocking.
+    With a WorldCache, seeds generated before are loaded from disk instead.
+
+    prepare(world, terrain_heights), if given, also runs on the thread once the
+    world exists; its result (the state the game derives from a new world) is
+    available as prepared when the job is done.
+    """
+    def __init__(self, seed=None, cache=None, prepare=None):
+        self.seed = seed
+        self.cache = cache
+        self.prepare = prepare
+        self.prepared = None
+        self.progress = 0.0
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            generate = self.cache.generate if self.cache is not None else create_world
+            self._result = generate(self.seed, self._report)
+            if self.prepare is not None:
+                self.prepared = self.prepare(*self._result)
+        except Exception as e:
+            self._error = e
+        finally:
+            self.progress = 1.0
+            self._done.set()
+
+    def _report(self, fraction):
+        self.progress = fraction
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def result(self):
+        """
+        (world, terrain_heights), waiting for generation if it is still running.
+        Errors raised by the generator are re-raised here, on the caller's thread.
+        """
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+class WorldPool:
+    """
+    Keeps WORLD_POOL_SIZE random-seed worlds generating ahead of time, so a new
+    random world is usually ready the moment it is asked for. Every take()
+    starts a replacement in the background.
+    """
+    def __init__(self, size=WORLD_POOL_SIZE, prepare=None):
+        self.size = size
+        self.prepare = prepare
+        self.jobs = deque()
+        self.fill()
+
+    def fill(self):
+        while len(self.jobs) < self.size:
+            self.jobs.append(WorldJob(prepare=self.prepare))
+
+    def take(self):
+        """
+        A job for a new random world; finished already unless the pool is
+        still warming up (or empty, with size 0).
+        """
+        job = next((job for job in self.jobs if job.done), None)
+        if job is not None:
+            self.jobs.remove(job)
+        elif self.jobs:
+            job = self.jobs.popleft()
+        else:
+            job = WorldJob(prepare=self.prepare)
+        self.fill()
+        return job
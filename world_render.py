@@ -0,0 +1,96 @@
+# world_render.py
+import pygame
+from config import *
+
+# Block colors as a 256-entry palette, so a chunk of block IDs is an 8-bit image as-is.
+PALETTE = [COLOR[block] if block < len(COLOR) else (255, 0, 255) for block in range(256)]
+
+def tile_pixels(zoom):
+    """
+    On-screen size of one block at a zoom level.
+    """
+    return max(1, int(round(TILE_SIZE * zoom)))
+
+def draw_tiles(screen, world, camera_x, camera_y, view_width, view_height, zoom=1):
+    """
+    Draw the blocks inside the viewport one rect each (close zoom levels).
+    camera_x/camera_y are in world pixels; view_width/view_height in screen pixels.
+    """
+    size = tile_pixels(zoom)
+    x_start = max(0, int(camera_x // TILE_SIZE))
+    x_end = min(WORLD_WIDTH, int((camera_x + view_width / zoom) // TILE_SIZE) + 1)
+    y_start = max(0, int(camera_y // TILE_SIZE))
+    y_end = min(WORLD_HEIGHT, int((camera_y + view_height / zoom) // TILE_SIZE) + 1)
+    offset_x = int(camera_x * zoom)
+    offset_y = int(camera_y * zoom)
+    outline = size >= 8
+    for x in range(x_start, x_end):
+        column = world[x]
+        for y in range(y_start, y_end):
+            block_type = column[y]
+            if block_type != AIR:
+                rect = pygame.Rect(x * size - offset_x, y * size - offset_y, size, size)
+                pygame.draw.rect(screen, COLOR[block_type], rect)
+                if outline:
+                    pygame.draw.rect(screen, (0,0,0), rect, 1)
+
+class ChunkImages:
+    """
+    Downsampled images of the world for far zoom levels. Each chunk's base image
+    has one pixel per block and is built by copying its block IDs straight into
+    an 8-bit surface whose palette is COLOR; enlarged copies are cached per zoom
+    level. An edit only invalidates the images of its own chunk, so drawing a
+    zoomed-out view costs one blit per visible chunk.
+    """
+    def __init__(self):
+        self.world = None
+        self.base = {}     # (cx, cy) -> 1 pixel per block image
+        self.scaled = {}   # (cx, cy, tile pixels) -> image drawn to the screen
+
+    def reset(self, world):
+        self.world = world
+        self.base.clear()
+        self.scaled.clear()
+
+    def invalidate(self, cx, cy):
+        if self.base.pop((cx, cy), None) is not None:
+            for key in [key for key in self.scaled if key[0] == cx and key[1] == cy]:
+                del self.scaled[key]
+
+    def _build(self, cx, cy):
+        x0, y0 = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+        width = min(CHUNK_SIZE, WORLD_WIDTH - x0)
+        height = min(CHUNK_SIZE, WORLD_HEIGHT - y0)
+        pixels = bytearray(width * height)
+        for dx in range(width):
+            # World data is column-major; each column fills one strided slice.
+            pixels[dx::width] = bytes(self.world[x0 + dx][y0:y0 + height])
+        image = pygame.image.frombuffer(bytes(pixels), (width, height), "P")
+        image.set_palette(PALETTE)
+        return image
+
+    def get(self, cx, cy, size):
+        key = (cx, cy, size)
+        image = self.scaled.get(key)
+        if image is None:
+            base = self.base.get((cx, cy))
+            if base is None:
+                base = self.base[(cx, cy)] = self._build(cx, cy)
+            # Converted to the display's pixel format so blits skip the palette lookup.
+            image = pygame.transform.scale(base, (base.get_width() * size, base.get_height() * size)).convert()
+            self.scaled[key] = image
+        return image
+
+    def draw(self, screen, camera_x, camera_y, view_width, view_height, zoom):
+        size = tile_pixels(zoom)
+        chunk_world = CHUNK_SIZE * TILE_SIZE
+        cx_start = max(0, int(camera_x // chunk_world))
+        cx_end = min((WORLD_WIDTH - 1) // CHUNK_SIZE, int((camera_x + view_width / zoom) // chunk_world))
+        cy_start = max(0, int(camera_y // chunk_world))
+        cy_end = min((WORLD_HEIGHT - 1) // CHUNK_SIZE, int((camera_y + view_height / zoom) // chunk_world))
+        offset_x = int(camera_x * zoom)
+        offset_y = int(camera_y * zoom)
+        for cx in range(cx_start, cx_end + 1):
+            for cy in range(cy_start, cy_end + 1):
+                screen.blit(self.get(cx, cy, size),
+                            (cx * CHUNK_SIZE * size - offset_x, cy * CHUNK_SIZE * size - offset_y))